@@ -0,0 +1,192 @@
+"""Offscreen benchmarks of the task screens.
+
+    python bench.py [--sizes 10 1000 10000 100000] [--repeat 5] [--output bench.json]
+
+Every size runs in its own process against a freshly seeded database, so peak RSS is per size and a crash of one
+size is recorded instead of ending the run. The results are written as JSON to compare runs.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+WORDS = ("buy milk call mum report meeting review invoice plan trip clean garage fix bike email team write "
+         "draft book dentist pay rent water plants update budget prepare slides order parts read paper").split()
+
+
+def seed(path, tasks, finished):
+    """Create a database at `path` holding `tasks` active and `finished` finished synthetic tasks."""
+    from database import TaskRepository
+
+    if os.path.exists(path):
+        os.remove(path)
+    repository = TaskRepository(path)
+    now = int(time.time())
+    rng = random.Random(tasks * 31 + finished)
+    with repository.con:
+        repository.con.executemany(
+            "INSERT INTO tasks(title, text_content, time_limit) VALUES (?, ?, ?)",
+            ((" ".join(rng.choices(WORDS, k=2)), " ".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+              now + rng.randint(-3 * 86400, 60 * 86400)) for i in range(tasks)))
+        repository.con.executemany(
+            "INSERT INTO finished_tasks(title, text_content, time_done) VALUES (?, ?, ?)",
+            ((" ".join(rng.choices(WORDS, k=2)), " ".join(rng.choices(WORDS, k=rng.randint(3, 12))),
+              now - (finished - i) * 60) for i in range(finished)))
+    repository.tracker.prune()
+    repository.close()
+
+
+def timed(function, repeat=1):
+    """Run `function` `repeat` times and return the median and max wall time in milliseconds."""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(times), "max_ms": max(times)}
+
+
+def runOne(path, repeat):
+    """Benchmark the screens against the database at `path` in this process and return the measurements."""
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PySide6.QtCore import QDateTime, QSettings
+    from PySide6.QtWidgets import QApplication
+
+    import main
+    import perf
+    from dbworker import DbClient
+
+    app = QApplication([])
+    main.repository = DbClient(path)
+    results = {}
+
+    def settle():
+        # wait for the database thread, then let the views paint and request what they still miss
+        for i in range(3):
+            main.repository.waitForIdle()
+            app.processEvents()
+        main.repository.waitForIdle()
+
+    window = None
+
+    def startup():
+        nonlocal window
+        # settings of its own, the user's could point the window at another list or change how it closes
+        window = main.mainApp(settings=QSettings(path + ".ini", QSettings.Format.IniFormat))
+        window.show()
+        settle()
+
+    results["startup"] = timed(startup)
+    screen, history = window.display_widget, window.finishedScreen()
+
+    def fullUpdate():
+        screen.revision = None
+        screen.updateData()
+        settle()
+
+    def generateData():
+        history.generateData()
+        settle()
+
+    def switchScreens():
+        window.SwitchScreen(1)
+        settle()
+        window.SwitchScreen(0)
+        settle()
+
+    def add():
+        screen.switchAdding()
+        screen.titleEntry.setText("benchmark task")
+        screen.descEntry.setText("added by bench.py")
+        screen.timeEntry.setDateTime(QDateTime.currentDateTime().addDays(3))
+        screen.acceptForm()
+        settle()
+
+    def firstEditableTask():
+        for row in range(screen.model.rowCount()):
+            task = screen.model.task(row)
+            if task[3] > time.time() + 3600:
+                return task[0]
+
+    def edit():
+        screen.setEditedId(firstEditableTask())
+        screen.titleEntry.setText("edited by bench.py")
+        screen.acceptForm()
+        settle()
+
+    def finish():
+        screen.finishTask(firstEditableTask())
+        settle()
+
+    results["update_data"] = timed(fullUpdate, repeat)
+    results["generate_data"] = timed(generateData, repeat)
+    results["switch_screen"] = timed(switchScreens, repeat)
+    results["add"] = timed(add, repeat)
+    results["edit"] = timed(edit, repeat)
+    results["finish"] = timed(finish, repeat)
+    results["widgets"] = len(QApplication.allWidgets())
+    results["perf"] = perf.stats()
+    results["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    window.close()
+    main.repository.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the task screens offscreen.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000],
+                        help="number of active and of finished tasks to seed, one run per size")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of every timed operation")
+    parser.add_argument("--output", default="bench.json", help="JSON file the results are written to")
+    parser.add_argument("--data-dir", default=None, help="where the seeded databases go (a temporary directory)")
+    parser.add_argument("--run-one", metavar="DB", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        json.dump(runOne(args.run_one, args.repeat), sys.stdout)
+        return
+
+    dataDir = args.data_dir or tempfile.mkdtemp(prefix="todo-bench-")
+    here = os.path.dirname(os.path.abspath(__file__))
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": [],
+    }
+    try:
+        for size in args.sizes:
+            path = os.path.join(dataDir, f"taskManager-{size}.db")
+            start = time.perf_counter()
+            seed(path, size, size)
+            entry = {"size": size, "seed_ms": (time.perf_counter() - start) * 1000}
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-one", path,
+                                      "--repeat", str(args.repeat)], cwd=here, capture_output=True, text=True)
+            if process.returncode == 0:
+                entry.update(json.loads(process.stdout.strip().splitlines()[-1]))
+            else:
+                entry["error"] = f"exit code {process.returncode}: " + process.stderr.strip()[-2000:]
+            report["results"].append(entry)
+            print(json.dumps(entry), flush=True)
+    finally:
+        # the seeded databases are only kept in a directory that was asked for
+        if args.data_dir is None:
+            shutil.rmtree(dataDir, ignore_errors=True)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
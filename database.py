@@ -0,0 +1,535 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+import transfer
+from recurrence import Recurrence
+
+TRACKED_TABLES = ("tasks", "finished_tasks")
+
+# revisions kept in the change log, consumers further behind than this fall back to a full reload
+CHANGE_LOG_SIZE = 10000
+
+# pragmas every TaskRepository connection is opened with, a repository can override any of them
+# WAL lets readers and the writer work at the same time and, with synchronous=NORMAL, commits without an fsync
+# (only a checkpoint syncs), a power loss can lose the last commits but never corrupts the database
+CONNECTION_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -32768,  # KiB
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# databases a RepositoryPool keeps open at most, and seconds one may stay unused before it is closed
+POOL_SIZE = 4
+POOL_IDLE_TIMEOUT = 300
+
+
+def installChangeTracking(cur):
+    """Create the change log and the triggers that append every insert/update/delete of a tracked table to it."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS changes(
+            revision INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL)
+    """)
+    for table in TRACKED_TABLES:
+        for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_log AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO changes(table_name, row_id) VALUES ('{table}', {row}.rowid);
+                END
+            """)
+
+
+def createLegacyTables(cur):
+    cur.execute("CREATE TABLE IF NOT EXISTS tasks(title, text_content, time_limit)")
+    cur.execute("CREATE TABLE IF NOT EXISTS finished_tasks(title, text_content, time_done)")
+    installChangeTracking(cur)
+
+
+def typedTables(cur):
+    """Rebuild both tables with an INTEGER PRIMARY KEY (keeping the old rowids), typed columns and epoch
+    timestamps instead of str(datetime) text, plus the indexes behind their ORDER BY."""
+    for table, timeColumn in (("tasks", "time_limit"), ("finished_tasks", "time_done")):
+        cur.execute(f"""
+            CREATE TABLE {table}_new(
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                text_content TEXT NOT NULL,
+                {timeColumn} INTEGER NOT NULL)
+        """)
+        # str(datetime) is local time, the 'utc' modifier converts it to a UTC epoch
+        cur.execute(f"""
+            INSERT INTO {table}_new(id, title, text_content, {timeColumn})
+            SELECT rowid, COALESCE(title, ''), COALESCE(text_content, ''),
+                   COALESCE(CAST(strftime('%s', substr({timeColumn}, 1, 19), 'utc') AS INTEGER),
+                            CAST(strftime('%s', 'now') AS INTEGER))
+            FROM {table}
+        """)
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        cur.execute(f"CREATE INDEX {table}_{timeColumn} ON {table}({timeColumn})")
+    installChangeTracking(cur)
+
+
+def finishedArchive(cur):
+    cur.execute("""
+        CREATE TABLE finished_tasks_archive(
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            text_content TEXT NOT NULL,
+            time_done INTEGER NOT NULL)
+    """)
+    cur.execute("CREATE INDEX finished_tasks_archive_time_done ON finished_tasks_archive(time_done)")
+
+
+def fullTextIndex(cur):
+    """Index title and text_content of both tables with FTS5 external content tables kept in sync by triggers.
+    SQLite builds without FTS5 skip this and search falls back to LIKE."""
+    for table in TRACKED_TABLES:
+        try:
+            cur.execute(f"""
+                CREATE VIRTUAL TABLE {table}_fts USING fts5(
+                    title, text_content, content='{table}', content_rowid='id', prefix='2 3')
+            """)
+        except sqlite3.OperationalError as error:
+            if "fts5" not in str(error):
+                raise
+            return
+        cur.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        cur.execute(f"""
+            CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content);
+            END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, title, text_content)
+                VALUES ('delete', old.id, old.title, old.text_content);
+            END
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER {table}_fts_update AFTER UPDATE OF title, text_content ON {table} BEGIN
+                INSERT INTO {table}_fts({table}_fts, rowid, title, text_content)
+                VALUES ('delete', old.id, old.title, old.text_content);
+                INSERT INTO {table}_fts(rowid, title, text_content) VALUES (new.id, new.title, new.text_content);
+            END
+        """)
+
+
+def recurringTasks(cur):
+    """A series of repeating tasks keeps its rule in recurrences and only its next occurrence as a row of tasks, so
+    the time_limit index orders every series by its next due date however many occurrences it will have."""
+    cur.execute("""
+        CREATE TABLE recurrences(
+            id INTEGER PRIMARY KEY,
+            rule TEXT NOT NULL,
+            start INTEGER NOT NULL,
+            occurrences INTEGER NOT NULL DEFAULT 1)
+    """)
+    cur.execute("ALTER TABLE tasks ADD COLUMN recurrence_id INTEGER REFERENCES recurrences(id)")
+    cur.execute("CREATE INDEX tasks_recurrence_id ON tasks(recurrence_id) WHERE recurrence_id IS NOT NULL")
+
+
+def taskReminders(cur):
+    cur.execute("ALTER TABLE tasks ADD COLUMN remind_before INTEGER")
+
+
+# MIGRATIONS[n] upgrades a database from PRAGMA user_version n to n + 1
+MIGRATIONS = [
+    createLegacyTables,
+    typedTables,
+    finishedArchive,
+    fullTextIndex,
+    recurringTasks,
+    taskReminders,
+]
+
+
+def migrate(con):
+    """Upgrade the schema of `con` in place, running every pending migration in its own transaction."""
+    cur = con.cursor()
+    version = cur.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in enumerate(MIGRATIONS[version:], version + 1):
+        cur.execute("BEGIN")
+        try:
+            migration(cur)
+            cur.execute(f"PRAGMA user_version = {target}")
+        except Exception:
+            con.rollback()
+            raise
+        con.commit()
+
+
+class ChangeTracker:
+    """Tells the screens which rows changed since the revision they last saw.
+
+    The current revision is only re-read when `PRAGMA data_version` (writes from other connections) or
+    `total_changes` (writes from this one) moved, so polling an idle database costs no table reads.
+    """
+
+    def __init__(self, con):
+        self.con = con
+        self._stamp = None
+        self._revision = 0
+        self.prune()
+
+    def revision(self):
+        stamp = (self.con.execute("PRAGMA data_version").fetchone()[0], self.con.total_changes)
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._revision = self.con.execute("SELECT COALESCE(MAX(revision), 0) FROM changes").fetchone()[0]
+        return self._revision
+
+    def changedRows(self, table, since):
+        """Return (revision, rowids of `table` changed after `since`), rowids are None if the log no longer
+        reaches back to `since` and the caller has to reload everything."""
+        revision = self.revision()
+        if since is None:
+            return revision, None
+        if revision == since:
+            return revision, set()
+        oldest = self.con.execute("SELECT MIN(revision) FROM changes").fetchone()[0]
+        if oldest is None or oldest > since + 1:
+            return revision, None
+        rows = self.con.execute(
+            "SELECT DISTINCT row_id FROM changes WHERE table_name = ? AND revision > ? AND revision <= ?",
+            (table, since, revision))
+        return revision, {row[0] for row in rows}
+
+    def prune(self):
+        self.con.execute("DELETE FROM changes WHERE revision <= (SELECT MAX(revision) FROM changes) - ?",
+                         (CHANGE_LOG_SIZE,))
+        self.con.commit()
+
+
+def ftsQuery(text):
+    """Turn what the user typed into an FTS5 query matching rows that contain every word as a prefix.
+
+    Single characters are left out, a one letter prefix matches most of the table and the prefix indexes only
+    start at two."""
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in text.split() if len(word) > 1)
+
+
+def likePatterns(text):
+    return ["%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for word in text.split()]
+
+
+def idList(ids):
+    """Bind a list of ids as a single parameter, used as `id IN (SELECT value FROM json_each(?))` so the statement
+    text stays the same whatever the number of ids."""
+    return json.dumps(list(ids))
+
+
+def applyProfile(con, profile):
+    for name, value in profile.items():
+        con.execute(f"PRAGMA {name} = {value}")
+
+
+class TaskRepository:
+    """Owns the connection to a task database, every statement it runs is parameterized.
+
+    `profile` overrides entries of CONNECTION_PROFILE, e.g. {"synchronous": "FULL"} to sync every commit.
+    """
+
+    def __init__(self, path="taskManager.db", profile=None):
+        self.path = path
+        self.con = sqlite3.connect(path, cached_statements=256)
+        applyProfile(self.con, {**CONNECTION_PROFILE, **(profile or {})})
+        migrate(self.con)
+        self.tracker = ChangeTracker(self.con)
+        self.fullTextSearch = self.con.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('tasks_fts', 'finished_tasks_fts')").fetchone()[0] == 2
+
+    def close(self):
+        self.con.execute("PRAGMA optimize")
+        self.con.close()
+
+    def maintain(self):
+        """Refresh the query planner statistics where they went stale and fold the write-ahead log back into the
+        database, without waiting for readers. The change log is cut back to its last CHANGE_LOG_SIZE revisions,
+        an app left running would grow it without end otherwise."""
+        self.tracker.prune()
+        self.con.execute("PRAGMA optimize")
+        self.con.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def changedRows(self, table, since):
+        return self.tracker.changedRows(table, since)
+
+    def activeTaskChanges(self, since):
+        """Return (revision, rows, changed ids) for the tasks changed after revision `since`, the changed ids are
+        None when `rows` is the whole table instead."""
+        revision, changed = self.changedRows("tasks", since)
+        if changed is None or len(changed) > 500:
+            return revision, self.activeTasks(), None
+        return revision, self.activeTasksById(changed) if changed else [], changed
+
+    def finishedTaskSummary(self, since):
+        """Return (revision, changed ids, number of finished tasks) with changed ids as in changedRows(), the count
+        is only worked out when something changed and is None otherwise."""
+        revision, changed = self.changedRows("finished_tasks", since)
+        return revision, changed, None if changed == set() else self.countFinishedTasks()
+
+    def activeTasks(self):
+        """(id, title, text_content, time_limit, recurrence rule or None, seconds the reminder comes before the
+        deadline or None) of every task, by deadline."""
+        return self.con.execute("""
+            SELECT t.id, t.title, t.text_content, t.time_limit, r.rule, t.remind_before
+            FROM tasks t LEFT JOIN recurrences r ON r.id = t.recurrence_id
+            ORDER BY t.time_limit, t.id
+        """).fetchall()
+
+    def activeTasksById(self, ids):
+        return self.con.execute("""
+            SELECT t.id, t.title, t.text_content, t.time_limit, r.rule, t.remind_before
+            FROM tasks t LEFT JOIN recurrences r ON r.id = t.recurrence_id
+            WHERE t.id IN (SELECT value FROM json_each(?))
+        """, (idList(ids),)).fetchall()
+
+    def finishedTasks(self):
+        return self.con.execute(
+            "SELECT id, title, text_content, time_done FROM finished_tasks ORDER BY time_done, id").fetchall()
+
+    def finishedPage(self, afterKey, offset, limit):
+        """Return up to `limit` finished tasks following the (time_done, id) `afterKey`. Without a key the page
+        starts `offset` rows in, which only costs a scan for pages the caller never reached sequentially."""
+        if afterKey is not None:
+            return self.con.execute("""
+                SELECT id, title, text_content, time_done FROM finished_tasks
+                WHERE (time_done, id) > (?, ?) ORDER BY time_done, id LIMIT ?
+            """, (afterKey[0], afterKey[1], limit)).fetchall()
+        return self.con.execute(
+            "SELECT id, title, text_content, time_done FROM finished_tasks ORDER BY time_done, id LIMIT ? OFFSET ?",
+            (limit, offset)).fetchall()
+
+    def countTasks(self):
+        return self.con.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def countFinishedTasks(self):
+        return self.con.execute("SELECT COUNT(*) FROM finished_tasks").fetchone()[0]
+
+    def addTask(self, title, textContent, timeLimit, rule=None, remindBefore=None):
+        """Add a task, with a recurrence `rule` it is the first occurrence of a new series and with `remindBefore`
+        a reminder is shown that many seconds before its deadline. Returns its id."""
+        with self.con:
+            seriesId = self._newSeries(rule, timeLimit) if rule else None
+            return self.con.execute("""
+                INSERT INTO tasks(title, text_content, time_limit, recurrence_id, remind_before) VALUES (?, ?, ?, ?, ?)
+            """, (title, textContent, timeLimit, seriesId, remindBefore)).lastrowid
+
+    def updateTask(self, taskId, title, textContent, timeLimit, rule=None, remindBefore=None):
+        """Update a task, `rule` replaces its recurrence rule and None makes it a one-off task.
+
+        A new rule restarts the series from the new deadline, a new deadline alone moves the series without counting
+        its occurrences again. `remindBefore` replaces its reminder, None removes it."""
+        with self.con:
+            row = self.con.execute("""
+                SELECT t.recurrence_id, t.time_limit, r.rule
+                FROM tasks t LEFT JOIN recurrences r ON r.id = t.recurrence_id WHERE t.id = ?
+            """, (taskId,)).fetchone()
+            seriesId, oldTimeLimit, oldRule = row if row else (None, None, None)
+            if not rule:
+                if seriesId is not None:
+                    self.con.execute("DELETE FROM recurrences WHERE id = ?", (seriesId,))
+                seriesId = None
+            elif seriesId is None:
+                seriesId = self._newSeries(rule, timeLimit)
+            elif rule != oldRule:
+                Recurrence(rule)
+                self.con.execute("UPDATE recurrences SET rule = ?, start = ?, occurrences = 1 WHERE id = ?",
+                                 (rule, timeLimit, seriesId))
+            elif timeLimit != oldTimeLimit:
+                # a rescheduled occurrence moves the anchor but stays the same occurrence of a COUNT series, an edit
+                # of the title or description keeps the anchor, e.g. the 31st of a monthly series
+                self.con.execute("UPDATE recurrences SET start = ? WHERE id = ?", (timeLimit, seriesId))
+            self.con.execute(
+                "UPDATE tasks SET title = ?, text_content = ?, time_limit = ?, recurrence_id = ?, remind_before = ? "
+                "WHERE id = ?",
+                (title, textContent, timeLimit, seriesId, remindBefore, taskId))
+
+    def _newSeries(self, rule, start):
+        Recurrence(rule)  # raises ValueError for a rule that can't be scheduled
+        return self.con.execute("INSERT INTO recurrences(rule, start) VALUES (?, ?)", (rule, start)).lastrowid
+
+    def finishTask(self, taskId):
+        self.finishTasks([taskId])
+
+    def finishTasks(self, ids, timeDone=None):
+        """Move the given tasks to finished_tasks in one transaction. A repeating task is followed by the next
+        occurrence of its series, generated only now, and the series ends with its last occurrence."""
+        ids = idList(ids)
+        timeDone = int(time.time()) if timeDone is None else timeDone
+        with self.con:
+            recurring = self.con.execute("""
+                SELECT t.title, t.text_content, t.time_limit, t.remind_before, r.id, r.rule, r.start, r.occurrences
+                FROM tasks t JOIN recurrences r ON r.id = t.recurrence_id
+                WHERE t.id IN (SELECT value FROM json_each(?))
+            """, (ids,)).fetchall()
+            self.con.execute("""
+                INSERT INTO finished_tasks(title, text_content, time_done)
+                SELECT title, text_content, ? FROM tasks
+                WHERE id IN (SELECT value FROM json_each(?)) ORDER BY time_limit, id
+            """, (timeDone, ids))
+            self.con.execute("DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+            for title, textContent, timeLimit, remindBefore, seriesId, rule, start, occurrences in recurring:
+                # a task finished after its deadline skips the occurrences it missed
+                nextDue = Recurrence(rule).nextOccurrence(start, max(timeLimit, timeDone), occurrences)
+                if nextDue is None:
+                    self.con.execute("DELETE FROM recurrences WHERE id = ?", (seriesId,))
+                    continue
+                self.con.execute("""
+                    INSERT INTO tasks(title, text_content, time_limit, recurrence_id, remind_before)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (title, textContent, nextDue, seriesId, remindBefore))
+                self.con.execute("UPDATE recurrences SET occurrences = occurrences + 1 WHERE id = ?", (seriesId,))
+
+    def deleteTask(self, taskId):
+        self.deleteTasks([taskId])
+
+    def deleteTasks(self, ids):
+        """Delete the given tasks, deleting a repeating task ends its series."""
+        ids = idList(ids)
+        with self.con:
+            self.con.execute("""
+                DELETE FROM recurrences WHERE id IN (
+                    SELECT recurrence_id FROM tasks WHERE id IN (SELECT value FROM json_each(?)))
+            """, (ids,))
+            self.con.execute("DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+
+    def rescheduleTasks(self, ids, timeLimit):
+        with self.con:
+            self.con.execute("UPDATE tasks SET time_limit = ? WHERE id IN (SELECT value FROM json_each(?))",
+                             (timeLimit, idList(ids)))
+
+    def archiveFinishedTasks(self, olderThanDays):
+        """Move the tasks finished more than `olderThanDays` days ago to finished_tasks_archive, returns how many."""
+        before = int(time.time()) - olderThanDays * 86400
+        with self.con:
+            self.con.execute("""
+                INSERT INTO finished_tasks_archive(title, text_content, time_done)
+                SELECT title, text_content, time_done FROM finished_tasks WHERE time_done < ? ORDER BY time_done, id
+            """, (before,))
+            return self.con.execute("DELETE FROM finished_tasks WHERE time_done < ?", (before,)).rowcount
+
+    def importTasks(self, table, path, format=None, progress=None):
+        """Insert the tasks of a CSV or JSON Lines file into `table` in transactions of transfer.BATCH_SIZE rows,
+        returns how many.
+
+        The whole file is read once before anything is inserted, so a record that can not be imported stops the
+        import before its first batch and a fixed file can be imported again without duplicates."""
+        for row in transfer.readTasks(path, table, format):
+            pass
+        count = 0
+        for batch in transfer.batched(transfer.readTasks(path, table, format), transfer.BATCH_SIZE):
+            self.insertTasks(table, batch)
+            count += len(batch)
+            if progress is not None:
+                progress(count)
+        # readers that far behind reload everything anyway
+        self.tracker.prune()
+        return count
+
+    def insertTasks(self, table, rows):
+        """Insert (title, text_content, time) rows into `table` in one transaction.
+
+        The full-text index gets the whole batch in one statement, through its per row trigger that is several times
+        slower. The trigger is only missing inside the transaction, so no other connection ever writes without it.
+        """
+        with self.con:
+            self.con.execute("BEGIN IMMEDIATE")
+            trigger = self.fullTextSearch and self.con.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f"{table}_fts_insert",)).fetchone()
+            if trigger:
+                self.con.execute(f"DROP TRIGGER {table}_fts_insert")
+            lastId = self.con.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            self.con.executemany(f"INSERT INTO {table}({', '.join(transfer.columns(table))}) VALUES (?, ?, ?)", rows)
+            if trigger:
+                self.con.execute(f"""
+                    INSERT INTO {table}_fts(rowid, title, text_content)
+                    SELECT id, title, text_content FROM {table} WHERE id > ?
+                """, (lastId,))
+                self.con.execute(trigger[0])
+
+    def exportTasks(self, table, path, format=None, progress=None):
+        return transfer.exportRows(self.con, table, path, format, progress)
+
+    def searchTaskIds(self, text):
+        """Return the ids of all the active tasks whose title or description contain every word of `text`. They are
+        not limited, the screen has every active task in memory already and only filters them by these ids."""
+        if not ftsQuery(text):
+            return []
+        if self.fullTextSearch:
+            rows = self.con.execute("SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?", (ftsQuery(text),))
+        else:
+            rows = self._likeSearch("tasks", "id", text, "", (), -1)  # LIMIT -1 is no limit
+        return [row[0] for row in rows]
+
+    def searchFinishedTasks(self, text, beforeId, limit):
+        """Return up to `limit` finished tasks matching `text` with an id below `beforeId` (None for the first
+        page), newest first."""
+        if not ftsQuery(text):
+            return []
+        beforeId = (1 << 63) - 1 if beforeId is None else beforeId
+        if self.fullTextSearch:
+            return self.con.execute("""
+                SELECT f.id, f.title, f.text_content, f.time_done
+                FROM finished_tasks_fts JOIN finished_tasks f ON f.id = finished_tasks_fts.rowid
+                WHERE finished_tasks_fts MATCH ? AND finished_tasks_fts.rowid < ?
+                ORDER BY finished_tasks_fts.rowid DESC LIMIT ?
+            """, (ftsQuery(text), beforeId, limit)).fetchall()
+        return self._likeSearch("finished_tasks", "id, title, text_content, time_done", text,
+                                "AND id < ? ORDER BY id DESC", (beforeId,), limit).fetchall()
+
+    def _likeSearch(self, table, columns, text, tail, params, limit):
+        patterns = likePatterns(text)
+        words = " AND ".join("(title LIKE ? ESCAPE '\\' OR text_content LIKE ? ESCAPE '\\')" for pattern in patterns)
+        return self.con.execute(f"SELECT {columns} FROM {table} WHERE {words} {tail} LIMIT ?",
+                                [pattern for pattern in patterns for column in (0, 1)] + list(params) + [limit])
+
+
+class RepositoryPool:
+    """Opens the TaskRepository of a database on its first use and keeps it open for the next ones, so going back to
+    a list costs no connect, migration check or cold statement cache. Every connection keeps its own cache of
+    prepared statements.
+
+    Beyond `size` open databases the least recently used one is closed, closeIdle() closes those unused for
+    `idleTimeout` seconds, so the file handles (three per database in WAL mode) stay bounded.
+    """
+
+    def __init__(self, profile=None, size=POOL_SIZE, idleTimeout=POOL_IDLE_TIMEOUT):
+        self.profile = profile
+        self.size = size
+        self.idleTimeout = idleTimeout
+        # absolute path -> (repository, time.monotonic() of its last use), least recently used first
+        self._open = OrderedDict()
+
+    def __len__(self):
+        return len(self._open)
+
+    def get(self, path):
+        key = os.path.abspath(path)
+        entry = self._open.pop(key, None)
+        repository = entry[0] if entry is not None else TaskRepository(path, self.profile)
+        self._open[key] = (repository, time.monotonic())
+        while len(self._open) > self.size:
+            self._close(next(iter(self._open)))
+        return repository
+
+    def closeIdle(self, now=None):
+        now = time.monotonic() if now is None else now
+        for key, (repository, used) in list(self._open.items()):
+            if now - used >= self.idleTimeout:
+                self._close(key)
+
+    def close(self):
+        for key in list(self._open):
+            self._close(key)
+
+    def _close(self, key):
+        repository, used = self._open.pop(key)
+        repository.close()
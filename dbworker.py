@@ -0,0 +1,141 @@
+import time
+import traceback
+
+from PySide6.QtCore import QEventLoop, QObject, QThread, QTimer, Signal, Slot
+
+import perf
+from database import RepositoryPool
+
+
+class DbWorker(QObject):
+    """Lives on the database thread and runs the TaskRepository methods requested by a DbClient on the database each
+    request names.
+
+    The repositories (and so their connections) are opened by a RepositoryPool on this thread, the GUI thread never
+    touches sqlite.
+    """
+
+    finished = Signal(int, object)
+    failed = Signal(int, str)
+    progress = Signal(int, object)
+
+    def __init__(self, profile=None):
+        super(DbWorker, self).__init__()
+
+        self.pool = RepositoryPool(profile)
+
+    @Slot(int, str, str, object, bool)
+    def run(self, requestId, path, method, args, reportsProgress):
+        try:
+            repository = self.pool.get(path)
+            kwargs = {"progress": lambda done: self.progress.emit(requestId, done)} if reportsProgress else {}
+            started = time.perf_counter()
+            result = getattr(repository, method)(*args, **kwargs)
+            perf.record("query." + method, started)
+        except Exception as error:
+            traceback.print_exc()
+            self.failed.emit(requestId, str(error))
+            return
+        finally:
+            self.pool.closeIdle()
+        self.finished.emit(requestId, result)
+
+    @Slot()
+    def shutdown(self):
+        self.pool.close()
+        QThread.currentThread().quit()
+
+
+class DbClient(QObject):
+    """GUI side of the database thread.
+
+    `call()` queues a TaskRepository method on the worker thread and hands its result to `callback` back on the GUI
+    thread. Requests run one at a time in the order they were made, so a mutation followed by a query sees its own
+    write. Methods taking a `progress` argument can report to a `progress` callback on the GUI thread too.
+
+    Requests go to the database at `path`, switchTo() points the later ones at another database. The results of
+    requests made before a switch are dropped instead of handed to their callbacks.
+    """
+
+    request = Signal(int, str, str, object, bool)
+    shutdownRequested = Signal()
+    error = Signal(str)
+
+    # ms between PRAGMA optimize and WAL checkpoints
+    MAINTENANCE_INTERVAL = 10 * 60 * 1000
+
+    def __init__(self, path="taskManager.db", parent=None, profile=None):
+        super(DbClient, self).__init__(parent)
+
+        self.path = path
+        self.profile = profile
+        # request id -> (callback, errback, progress, method, time.perf_counter() of the call, generation)
+        self._callbacks = {}
+        self._generation = 0  # bumped by switchTo()
+        self._nextId = 0
+        self._idleLoop = None
+
+        self.thread = QThread()
+        self.worker = DbWorker(profile)
+        self.worker.moveToThread(self.thread)
+        self.request.connect(self.worker.run)
+        self.shutdownRequested.connect(self.worker.shutdown)
+        self.worker.finished.connect(self._finished)
+        self.worker.failed.connect(self._failed)
+        self.worker.progress.connect(self._progress)
+        self.thread.start()
+
+        self.maintenanceTimer = QTimer(self)
+        self.maintenanceTimer.setInterval(self.MAINTENANCE_INTERVAL)
+        self.maintenanceTimer.timeout.connect(lambda: self.call("maintain"))
+        self.maintenanceTimer.start()
+
+    def call(self, method, *args, callback=None, errback=None, progress=None):
+        self._nextId += 1
+        self._callbacks[self._nextId] = (callback, errback, progress, method, time.perf_counter(),
+                                       self._generation)
+        self.request.emit(self._nextId, self.path, method, args, progress is not None)
+        return self._nextId
+
+    def switchTo(self, path):
+        self.path = path
+        self._generation += 1
+
+    def pending(self):
+        return len(self._callbacks)
+
+    def waitForIdle(self):
+        """Process events until every request made so far has been answered."""
+        if self._callbacks:
+            self._idleLoop = QEventLoop()
+            self._idleLoop.exec()
+            self._idleLoop = None
+
+    def close(self):
+        self.shutdownRequested.emit()
+        self.thread.wait()
+
+    def _finished(self, requestId, result):
+        callback, errback, progress, method, started, generation = self._callbacks.pop(requestId)
+        perf.record("db." + method, started)
+        if callback is not None and generation == self._generation:
+            callback(result)
+        self._checkIdle()
+
+    def _failed(self, requestId, message):
+        callback, errback, progress, method, started, generation = self._callbacks.pop(requestId)
+        # a failure of the database shown before a switch is as stale as its results
+        if generation == self._generation:
+            if errback is not None:
+                errback(message)
+            else:
+                self.error.emit(message)
+        self._checkIdle()
+
+    def _progress(self, requestId, done):
+        progress = self._callbacks[requestId][2]
+        progress(done)
+
+    def _checkIdle(self):
+        if not self._callbacks and self._idleLoop is not None:
+            self._idleLoop.quit()
@@ -0,0 +1,37 @@
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtWidgets import QStyledItemDelegate
+
+from models import TaskTableModel
+
+
+class TaskDelegate(QStyledItemDelegate):
+    """Paints task rows straight from the model roles, without going through the widget style."""
+
+    ROW_HEIGHT = 45
+    ICON_SIZE = 40
+
+    def paint(self, painter, option, index):
+        # ask the Python model directly, skipping the QVariant round trip of index.data()
+        model = index.model()
+        icon = model.data(index, Qt.ItemDataRole.DecorationRole)
+        if icon is not None:
+            rect = option.rect
+            side = min(self.ICON_SIZE, rect.width(), rect.height())
+            icon.paint(painter, rect.x() + (rect.width() - side) // 2, rect.y() + (rect.height() - side) // 2,
+                       side, side)
+            return
+
+        text = model.data(index, Qt.ItemDataRole.DisplayRole)
+        if not text:
+            return
+        painter.save()
+        painter.setFont(model.data(index, Qt.ItemDataRole.FontRole) or option.font)
+        painter.setPen(model.data(index, Qt.ItemDataRole.ForegroundRole) or option.palette.text().color())
+        text = painter.fontMetrics().elidedText(text, Qt.TextElideMode.ElideRight, option.rect.width())
+        painter.drawText(option.rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        if index.column() >= TaskTableModel.FINISH:
+            return QSize(50, self.ROW_HEIGHT)
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
@@ -1,389 +1,710 @@
-import datetime
+import contextlib
 import os
-import sqlite3
 import sys
-import threading
+import time
+
+# perf_counter() at startup, the reference of the startup.* measurements
+STARTED = time.perf_counter()
 
 import PySide6
-from PySide6.QtCore import QDateTime, Qt, QSize, QTimer
-from PySide6.QtGui import QCursor, QIcon, QPalette, QBrush, QLinearGradient, QColor
+from PySide6.QtCore import QDateTime, Qt, QSettings, QSize, QTimer, Signal
+from PySide6.QtGui import QPalette, QBrush, QLinearGradient, QColor, QKeySequence, QShortcut
 from PySide6.QtWidgets import (
     QApplication, QLabel, QMainWindow,
     QPushButton, QVBoxLayout, QWidget, QGridLayout, QHBoxLayout, QDialog, QStackedWidget, QDateTimeEdit, QLineEdit,
-    QMessageBox
+    QMessageBox, QTableView, QHeaderView, QFrame, QAbstractItemView, QInputDialog, QMenu, QFileDialog, QProgressDialog,
+    QComboBox, QSystemTrayIcon
 )
 
+import perf
+import recurrence
+import reminders
+import resources
+import transfer
+from database import ftsQuery
+from dbworker import DbClient
+from delegates import TaskDelegate
+from models import FinishedSearchModel, FinishedTasksModel, TaskFilterProxyModel, TaskTableModel
+
 dirname = os.path.dirname(PySide6.__file__)
 plugin_path = os.path.join(dirname, 'plugins', 'platforms')
 os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = plugin_path
 
-con = sqlite3.connect("taskManager.db", check_same_thread=False)
-cur = con.cursor()
-cur.execute(
-    "CREATE TABLE IF NOT EXISTS tasks(title, text_content, time_limit)")
-cur.execute(
-    "CREATE TABLE IF NOT EXISTS finished_tasks(title, text_content, time_done)")
+# DbClient of the open task database, created in main() once the QApplication exists
+repository = None
+
+# the default list, the other lists are the databases in LISTS_DIR named after them
+DEFAULT_LIST = "taskManager.db"
+LISTS_DIR = "lists"
+
+
+def iconButton(toolTip, iconName, width, height, iconSize, slot):
+    button = QPushButton("")
+    button.setToolTip(toolTip)
+    button.setFixedSize(width, height)
+    button.setIconSize(QSize(iconSize, iconSize))
+    button.setIcon(resources.icon(iconName))
+    button.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+    button.clicked.connect(slot)
+    return button
+
+
+def setStyleProperty(widget, name, value):
+    """Set a dynamic property the stylesheets select on and re-polish the widget only if it changed."""
+    if widget.property(name) != value:
+        widget.setProperty(name, value)
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+
+
+def searchEntry(slot):
+    """A search box calling `slot` once typing paused for a moment."""
+    entry = QLineEdit()
+    entry.setPlaceholderText("search")
+    entry.setClearButtonEnabled(True)
+    entry.setFixedWidth(300)
+    debounce = QTimer(entry)
+    debounce.setSingleShot(True)
+    debounce.setInterval(200)
+    debounce.timeout.connect(slot)
+    entry.textChanged.connect(lambda text: debounce.start())
+    return entry
+
+
+FILE_FILTERS = {"CSV (*.csv)": "csv", "JSON Lines (*.jsonl)": "jsonl"}
+
+
+def transferButton(parent, table, imported):
+    """An Import/Export menu button moving `table` from and to CSV or JSON Lines files, `imported` runs after an
+    import."""
+    button = QPushButton("Import/Export")
+    button.setObjectName("transferButton")
+    button.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+    menu = QMenu(button)
+    menu.addAction("Import...", lambda: transferFile(parent, "importTasks", table, imported))
+    menu.addAction("Export...", lambda: transferFile(parent, "exportTasks", table, None))
+    button.setMenu(menu)
+    return button
+
+
+def transferFile(parent, method, table, done):
+    """Ask for a file and import or export `table` through it on a database thread of its own, the screens keep
+    polling and editing through `repository` meanwhile."""
+    importing = method == "importTasks"
+    if importing:
+        path, fileFilter = QFileDialog.getOpenFileName(parent, "Import tasks", "", ";;".join(FILE_FILTERS))
+    else:
+        path, fileFilter = QFileDialog.getSaveFileName(parent, "Export tasks", table, ";;".join(FILE_FILTERS))
+    if not path:
+        return
+    format = FILE_FILTERS[fileFilter]
+    if importing:
+        # a file with a known extension is read as what it says it is
+        with contextlib.suppress(ValueError): format = transfer.fileFormat(path)
+    elif not path.endswith("." + format):
+        path += "." + format
+
+    dialog = QProgressDialog("Importing tasks..." if importing else "Exporting tasks...", None, 0, 0, parent)
+    dialog.setWindowTitle("Import" if importing else "Export")
+    dialog.setMinimumDuration(300)
+    client = DbClient(repository.path, parent, repository.profile)
+
+    def closeClient():
+        client.close()
+        client.deleteLater()
+
+    def finished(count):
+        dialog.close()
+        QTimer.singleShot(0, closeClient)
+        QMessageBox.information(parent, dialog.windowTitle(), f"{count} tasks {'imported' if importing else 'exported'}")
+        if done is not None: done()
+
+    def failed(message):
+        dialog.close()
+        QTimer.singleShot(0, closeClient)
+        QMessageBox.critical(parent, "Error", message)
+        if done is not None: done()
+
+    client.call(method, table, path, format, callback=finished, errback=failed,
+                progress=lambda count: dialog.setLabelText(f"{count} tasks {'imported' if importing else 'exported'}..."))
+
+
+def taskLists():
+    """(name, path) of every task list, the default one first."""
+    files = os.listdir(LISTS_DIR) if os.path.isdir(LISTS_DIR) else []
+    names = sorted(name[:-3] for name in files if name.endswith(".db"))
+    return [(listName(DEFAULT_LIST), DEFAULT_LIST)] + [(name, os.path.join(LISTS_DIR, name + ".db")) for name in names]
+
+
+def listName(path):
+    return "To-do list" if path == DEFAULT_LIST else os.path.splitext(os.path.basename(path))[0]
+
+
+def listsButton(parent, switch):
+    """A Lists menu button offering every task list and a new one, `switch` is called with the path of the list
+    chosen."""
+    button = QPushButton("Lists")
+    button.setObjectName("listsButton")
+    button.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+    menu = QMenu(button)
+    # lists are files, the menu is filled each time it opens
+    menu.aboutToShow.connect(lambda: fillListsMenu(menu, parent, switch))
+    button.setMenu(menu)
+    return button
+
+
+def fillListsMenu(menu, parent, switch):
+    menu.clear()
+    for name, path in taskLists():
+        action = menu.addAction(name, lambda path=path: switch(path))
+        action.setCheckable(True)
+        action.setChecked(path == repository.path)
+    menu.addSeparator()
+    menu.addAction("New list...", lambda: newList(parent, switch))
+
+
+def newList(parent, switch):
+    name, ok = QInputDialog.getText(parent, "New list", "Name of the new list:")
+    name = name.strip()
+    if not ok or not name:
+        return
+    path = os.path.join(LISTS_DIR, name + ".db")
+    if name != os.path.basename(name) or name.startswith("."):
+        QMessageBox.critical(parent, "Error", "A list name can not contain / or start with a dot!")
+    elif os.path.exists(path):
+        QMessageBox.critical(parent, "Error", f"There already is a list named {name}!")
+    else:
+        # the database is created by the first request to it
+        os.makedirs(LISTS_DIR, exist_ok=True)
+        switch(path)
+
+
+class TaskView(QTableView):
+    """Table view timing its paints as paint.<objectName>."""
+
+    def paintEvent(self, event):
+        with perf.measure("paint." + self.objectName()):
+            super(TaskView, self).paintEvent(event)
+
+
+def taskView(model, name):
+    view = TaskView()
+    view.setObjectName(name)
+    view.setModel(model)
+    view.setItemDelegate(TaskDelegate(view))
+    view.horizontalHeader().hide()
+    view.verticalHeader().hide()
+    view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(TaskDelegate.ROW_HEIGHT)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    view.setShowGrid(False)
+    view.setFrameShape(QFrame.Shape.NoFrame)
+    view.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+    return view
 
 
 class mainApp(QMainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, settings=None):
         super(mainApp, self).__init__(parent)
 
-        self.setWindowIcon(QIcon("img/appIcon.png"))
+        self.setWindowIcon(resources.icon("appIcon"))
         self.setWindowTitle("To-do list")
+        repository.error.connect(lambda message: QMessageBox.critical(self, "Error", message))
         self.central_widget = QStackedWidget()
         self.setCentralWidget(self.central_widget)
 
-        self.display_widget = displayTasksScreen(self)
+        with perf.measure("build.displayTasksScreen"):
+            self.display_widget = displayTasksScreen(self)
         self.central_widget.addWidget(self.display_widget)
-        self.central_widget.setStyleSheet(
-            "background-color:qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:0, stop:0 #4262e3,stop:1 #F8CDDA)")
-
-        self.finishedTasks_widget = finishedTasks(self)
-        self.finishedTasks_widget.setStyleSheet("""
-            QWidget{background-color:none}
-            QLabel{font-size:16pt; margin:0 auto}
-            QToolTip{background-color:none}
-         """)
-        self.central_widget.addWidget(self.finishedTasks_widget)
+        self.central_widget.setProperty("screen", "tasks")
+        self.central_widget.setStyleSheet("""
+            QStackedWidget[screen="tasks"]{background-color:qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:0, stop:0 #4262e3,stop:1 #F8CDDA)}
+            QStackedWidget[screen="finished"]{background-color:qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:0, stop:0 #c8f2c2,stop:1 #6da23f)}
+        """)
+
+        # built on the first switch to it, see finishedScreen()
+        self.finishedTasks_widget = None
         self.display_widget.setStyleSheet("""
                 QLabel{font-size: 17pt; margin: 0 auto; width:70px}
                 QLineEdit{font-size:10pt; height:25px; padding-left:3px; background-color:none; outline:none; border-radius:7px; margin:0 auto; width:70px}
                 QLineEdit:focus{border:1px solid #3232a8;}
                 QDateTimeEdit{font-size:10pt; height:25px; padding-left:3px;text-align:center; background-color:none; border:none; border-radius:7px;}
                 QDateTimeEdit:focus{border:1px solid #3232a8;}
+                QComboBox{font-size:10pt; height:25px; padding-left:3px; border:none; border-radius:7px;}
+                QLineEdit#descEntry{width:350px}
+                QLabel#header{font-size:22pt; font-weight:600; text-align:center; text-decoration:underline;}
+                QLabel#header[editing="true"]{font-size:30pt; text-decoration:none; color:blue}
+                QLabel#newTaskLabel{color:#ffb72c; font-weight:600; margin-top:25px}
+                QPushButton{border:none;}
+                QPushButton#transferButton, QPushButton#listsButton{font-size:11pt; text-decoration:underline;}
                 QWidget{background-color:none}
+                QTableView{background-color:transparent; border:none}
                 QToolTip{background-color:none}
                 """)
 
+        self.perfOverlay = perf.PerfOverlay(self)
+        QShortcut(QKeySequence("F12"), self, self.perfOverlay.toggle)
+        QShortcut(QKeySequence("Shift+F12"), self, lambda: print(perf.report(), file=sys.stderr))
+        if os.environ.get("TODO_PERF_OVERLAY"): self.perfOverlay.toggle()
+
+        # with a tray the app keeps running when its window is closed, so the reminders still show up
+        self.settings = QSettings("VVhispo", "To-do list") if settings is None else settings
+        self.tray = self.trayIcon() if QSystemTrayIcon.isSystemTrayAvailable() else None
+        self.reminders = reminders.ReminderService(self.tray, self)
+        self.display_widget.tasksChanged.connect(
+            lambda rows, changed: self.reminders.setTasks(rows) if changed is None
+            else self.reminders.applyChanges(rows, changed))
+
+        self.setMinimumSize(600, 200)
+        self.sizedScreen = None
         self.central_widget.setCurrentWidget(self.display_widget)
         self.SwitchSize(0)
+        self.firstFrameShown = False
+
+    def paintEvent(self, event):
+        super(mainApp, self).paintEvent(event)
+        if not self.firstFrameShown:
+            self.firstFrameShown = True
+            perf.record("startup.firstFrame", STARTED, logSlow=False)
+            # the first request opens (and if needed migrates) the database, only once the window is on screen
+            QTimer.singleShot(0, self.display_widget.updateData)
+
+    def trayIcon(self):
+        tray = QSystemTrayIcon(resources.icon("appIcon"), self)
+        tray.setToolTip("To-do list")
+        menu = QMenu(self)
+        menu.addAction("Show To-do list", self.showWindow)
+        self.runInBackground = menu.addAction("Keep running when closed")
+        self.runInBackground.setCheckable(True)
+        self.runInBackground.setChecked(self.settings.value("runInBackground", True, type=bool))
+        self.runInBackground.toggled.connect(lambda checked: self.settings.setValue("runInBackground", checked))
+        menu.addSeparator()
+        menu.addAction("Quit", QApplication.quit)
+        tray.setContextMenu(menu)
+        tray.activated.connect(
+            lambda reason: self.showWindow() if reason == QSystemTrayIcon.ActivationReason.Trigger else None)
+        QApplication.instance().setQuitOnLastWindowClosed(False)
+        tray.show()
+        return tray
+
+    def showWindow(self):
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        if self.central_widget.currentWidget() is self.display_widget: self.display_widget.updateData()
+
+    def closeEvent(self, event):
+        if self.tray is None:
+            super(mainApp, self).closeEvent(event)
+        elif self.runInBackground.isChecked():
+            event.ignore()
+            self.hide()
+            if not self.settings.value("backgroundHintShown", False, type=bool):
+                self.settings.setValue("backgroundHintShown", True)
+                self.tray.showMessage("To-do list", "Still running in the tray to show reminders, right click it to "
+                                      "quit", QSystemTrayIcon.MessageIcon.Information, 5000)
+        else:
+            QApplication.quit()
+
+    def switchList(self, path):
+        if path != repository.path: self.openList(path)
+        self.SwitchScreen(0)
+
+    def openList(self, path):
+        """Point the database thread and both screens at the list stored at `path`, the requests still running for
+        the list shown so far are dropped. The pool keeps the database open, switching back costs no reconnect."""
+        repository.switchTo(path)
+        self.settings.setValue("list", path)
+        self.setWindowTitle(listName(path))
+        self.display_widget.showList("TO DO LIST" if path == DEFAULT_LIST else listName(path).upper())
+        if self.finishedTasks_widget is not None: self.finishedTasks_widget.showList()
+
+    def finishedScreen(self):
+        if self.finishedTasks_widget is None:
+            with perf.measure("build.finishedTasks"):
+                self.finishedTasks_widget = finishedTasks(self)
+                self.finishedTasks_widget.setStyleSheet("""
+                    QWidget{background-color:none}
+                    QLabel{font-size:16pt; margin:0 auto}
+                    QLabel#header{font-size:22pt; font-weight:600; text-align:center; text-decoration:underline;}
+                    QLineEdit{font-size:10pt; height:25px; padding-left:3px; background-color:none; outline:none; border-radius:7px; margin:0 auto}
+                    QLineEdit:focus{border:1px solid #3232a8;}
+                    QPushButton{border:none;}
+                    QPushButton#archiveButton, QPushButton#transferButton{font-size:11pt; text-decoration:underline;}
+                    QTableView{background-color:transparent; border:none}
+                    QToolTip{background-color:none}
+                 """)
+                self.central_widget.addWidget(self.finishedTasks_widget)
+        return self.finishedTasks_widget
 
     def SwitchScreen(self, screen):
         if screen == 1:
-            self.central_widget.setCurrentWidget(self.finishedTasks_widget)
-            self.setWindowTitle("Finished Tasks")
+            self.central_widget.setCurrentWidget(self.finishedScreen())
+            name = listName(repository.path)
+            self.setWindowTitle("Finished Tasks" if repository.path == DEFAULT_LIST else f"Finished Tasks - {name}")
             self.finishedTasks_widget.generateData()
-            self.central_widget.setStyleSheet(
-                "background-color:qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:0, stop:0 #c8f2c2,stop:1 #6da23f)")
+            setStyleProperty(self.central_widget, "screen", "finished")
             self.SwitchSize(1)
         elif screen == 0:
             self.display_widget.updateData()
             self.central_widget.setCurrentWidget(self.display_widget)
-            self.setWindowTitle("To-do list")
-            self.central_widget.setStyleSheet(
-                "background-color:qlineargradient(spread:pad, x1:0, y1:0, x2:1, y2:0, stop:0 #4262e3,stop:1 #F8CDDA)")
+            self.setWindowTitle(listName(repository.path))
+            setStyleProperty(self.central_widget, "screen", "tasks")
             self.SwitchSize(0)
 
     def SwitchSize(self, screen):
-        if screen == 0:
-            self.setFixedSize(1000, self.display_widget.calcHeight())
-            if self.display_widget.calcHeight() < 200: self.setFixedSize(1000, 200)
-        elif screen == 1:
-            self.setFixedSize(800, self.finishedTasks_widget.calcHeight())
-            if self.finishedTasks_widget.calcHeight() < 200: self.setFixedSize(800, 200)
+        """Fit the window height to the rows of `screen`, at most as tall as the screen, the views scroll the rest.
+
+        The window stays resizable, its width only goes back to the default of the screen when switching screens.
+        """
+        with perf.measure("layout.SwitchSize"):
+            if screen == 0:
+                width, height = 1000, self.display_widget.calcHeight()
+            else:
+                width, height = 800, self.finishedTasks_widget.calcHeight()
+            if screen == self.sizedScreen: width = self.width()
+            self.sizedScreen = screen
+            available = self.screen().availableGeometry()
+            frame = self.frameGeometry().height() - self.height()
+            self.resize(min(width, available.width()), max(200, min(height, available.height() - frame)))
+        if self.perfOverlay.isVisible(): self.perfOverlay.refresh()
 
 
 class finishedTasks(QWidget):
     def __init__(self, parent=None):
         super(finishedTasks, self).__init__(parent)
 
-        self.tasks = []
+        self.revision = None
+        self.minute = None
 
         self.layout = QGridLayout()
 
-        self.generateData()
-
-        self.timer = QTimer()
-        self.timer.setInterval(5000)
-        self.timer.timeout.connect(self.generateData)
-        self.timer.start()
-
-    def generateData(self):
-        self.getTasks()
-
-        children = []
-        for i in range(self.layout.count()):
-            child = self.layout.itemAt(i).widget()
-            if child:
-                children.append(child)
-        for child in children:
-            if child:
-                child.deleteLater()
-
-        cancelBtn = QPushButton("")
-        cancelBtn.setToolTip("Go back")
-        cancelBtn.setFixedSize(50, 40)
-        cancelBtn.setIconSize(QSize(30, 30))
-        cancelBtn.setIcon(QIcon("img/cancel.png"))
-        cancelBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        cancelBtn.setStyleSheet("border:none;")
-        cancelBtn.clicked.connect(self.cancel)
+        cancelBtn = iconButton("Go back", "cancel", 50, 40, 30, self.cancel)
         self.layout.addWidget(cancelBtn, 0, 0, Qt.AlignmentFlag.AlignCenter)
 
         headerMain = QLabel("FINISHED TASKS")
-        headerMain.setStyleSheet("font-size:22pt; font-weight:600; text-align:center; text-decoration:underline;")
+        headerMain.setObjectName("header")
         self.layout.addWidget(headerMain, 0, 1, Qt.AlignmentFlag.AlignCenter)
 
+        archiveBtn = QPushButton("Archive")
+        archiveBtn.setToolTip("Archive old finished tasks")
+        archiveBtn.setObjectName("archiveButton")
+        archiveBtn.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+        archiveBtn.clicked.connect(self.archive)
+        self.layout.addWidget(archiveBtn, 0, 2, Qt.AlignmentFlag.AlignCenter)
+
+        self.searchEntry = searchEntry(self.search)
+        self.layout.addWidget(self.searchEntry, 1, 1, Qt.AlignmentFlag.AlignCenter)
+        self.layout.addWidget(transferButton(self, "finished_tasks", self.getTasks), 1, 2, Qt.AlignmentFlag.AlignCenter)
+
+        self.model = FinishedTasksModel(repository, self)
+        self.searchModel = FinishedSearchModel(repository, self)
+        self.view = taskView(self.model, "finished")
+        self.showModel(self.model)
+        self.layout.addWidget(self.view, 2, 0, 1, 3)
+
+        self.noTasksLabel = QLabel("You haven't finished any tasks!")
+        self.layout.addWidget(self.noTasksLabel, 3, 0, 1, 3, Qt.AlignmentFlag.AlignCenter)
+
         self.layout.setColumnStretch(0, 1)
         self.layout.setColumnStretch(1, 5)
         self.layout.setColumnStretch(2, 1)
+        self.setLayout(self.layout)
 
-        if len(self.tasks) == 0:
-            self.layout.setColumnStretch(0,1)
-            self.layout.setColumnStretch(1,8)
-            self.layout.addWidget(QLabel("You haven't finished any tasks!"), 1, 1, Qt.AlignmentFlag.AlignCenter)
-
-        for idx, task in enumerate(self.tasks):
-            title = QLabel(task[0])
-            self.layout.addWidget(title, idx + 1, 0, Qt.AlignmentFlag.AlignCenter)
-            desc = QLabel(task[1])
-            if len(task[1]) >= 43:
-                desc.setText(task[1][:40] + "...")
-            desc.setStyleSheet("width:400px")
-            self.layout.addWidget(desc, idx + 1, 1, Qt.AlignmentFlag.AlignCenter)
-            self.layout.addWidget(self.generateTimeLabel(task[2][:19]), idx + 1, 2, Qt.AlignmentFlag.AlignCenter)
+        # polls only while the screen is shown, SwitchScreen(1) refreshes it when it comes back
+        self.timer = QTimer()
+        self.timer.setInterval(5000)
+        self.timer.timeout.connect(self.updateIfChanged)
 
-        self.setLayout(self.layout)
+    def showEvent(self, event):
+        super(finishedTasks, self).showEvent(event)
+        self.timer.start()
 
-    def generateTimeLabel(self, timeString):
-        dt = datetime.datetime.strptime(timeString, "%Y-%m-%d %H:%M:%S")
-        delta = (datetime.datetime.now() - dt).total_seconds()
-        if delta > 86400:
-            return QLabel(str(round(delta / 86400)) + " days ago")
-        elif delta > 3600:
-            return QLabel(str(round(delta / 3600)) + " hours ago")
-        elif delta > 60:
-            return QLabel(str(round(delta / 60)) + " minutes ago")
-        else:
-            return QLabel("1 minute ago")
+    def hideEvent(self, event):
+        super(finishedTasks, self).hideEvent(event)
+        self.timer.stop()
+
+    def updateIfChanged(self):
+        self.getTasks()
 
-    def getTasks(self):
-        self.tasks = cur.execute("SELECT * FROM finished_tasks").fetchall()
+    def showList(self):
+        """Forget the list shown so far, the next generateData() loads the one `repository` switched to."""
+        self.revision = None
+        self.searchEntry.clear()
+        self.searchModel.text = ""
+        self.showModel(self.model)
+
+    def generateData(self):
+        self.getTasks(reload=True)
+
+    def getTasks(self, reload=False):
+        """Ask the database thread whether finished_tasks changed since the last call, the model drops its pages when
+        it did or `reload` is set."""
+        started = time.perf_counter()
+        repository.call("finishedTaskSummary", self.revision,
+                        callback=lambda result: self.setTasks(result, reload, started))
+
+    def setTasks(self, result, reload, started):
+        self.revision, changed, count = result
+        if reload or changed != set():
+            self.model.reload(count if count is not None else self.model.rowCount())
+            self.searchModel.reload(count)
+            self.noTasksLabel.setVisible(self.model.rowCount() == 0)
+            if self.isVisible(): self.parent().parent().SwitchSize(1)
+        elif self.minute != int(time.time() // 60):
+            self.view.model().refreshTimes()
+        self.minute = int(time.time() // 60)
+        perf.record("refresh.generateData" if reload else "refresh.finishedTasks", started)
+
+    def search(self):
+        text = self.searchEntry.text()
+        if ftsQuery(text):
+            self.showModel(self.searchModel)
+            self.searchModel.search(text)
+        else:
+            self.searchModel.text = ""
+            self.showModel(self.model)
+
+    def showModel(self, model):
+        if self.view.model() is not model:
+            self.view.setModel(model)
+        self.view.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.view.setColumnWidth(0, 200)
+        self.view.setColumnWidth(2, 180)
+
+    def archive(self):
+        days, accepted = QInputDialog.getInt(self, "Archive", "Archive tasks finished more than this many days ago:",
+                                             30, 0, 36500)
+        if accepted:
+            repository.call("archiveFinishedTasks", days)
+            self.getTasks()
 
     def calcHeight(self):
-        self.getTasks()
-        return len(self.tasks) * 45 + 50
+        return self.model.rowCount() * 45 + 100
 
     def cancel(self):
         self.parent().parent().SwitchScreen(0)
 
 
 class displayTasksScreen(QWidget):
+    # (rows, changed ids) of every refresh that changed something, as passed to TaskTableModel.applyChanges(), the
+    # changed ids are None when the rows are all the tasks
+    tasksChanged = Signal(object, object)
+
     def __init__(self, parent=None):
         super(displayTasksScreen, self).__init__(parent)
 
         self.editedId = -1
         self.addingNewTask = False
-        self.layout = QGridLayout()
-        self.updateData()
+        self.revision = None
+        self.loaded = False  # whether the first answer of the database arrived
+        self.title = "TO DO LIST"
+        # time.perf_counter() of the last switch to another list, None once its tasks were loaded
+        self.switchStarted = None
+        self.layout = QVBoxLayout()
+
+        self.headerMain = QLabel(self.title)
+        self.headerMain.setObjectName("header")
+        self.layout.addWidget(self.headerMain, 0, Qt.AlignmentFlag.AlignCenter)
+
+        self.searchEntry = searchEntry(self.search)
+        self.layout.addWidget(self.searchEntry, 0, Qt.AlignmentFlag.AlignCenter)
+
+        self.model = TaskTableModel(self)
+        self.proxy = TaskFilterProxyModel(self)
+        self.view = taskView(self.model, "tasks")
+        self.showModel(self.model)
+        self.view.setMouseTracking(True)
+        self.view.clicked.connect(self.taskClicked)
+        self.view.entered.connect(self.taskHovered)
+        self.view.viewportEntered.connect(lambda: self.view.viewport().unsetCursor())
+        self.layout.addWidget(self.view)
+
+        self.taskForm = QWidget()
+        formLayout = QGridLayout()
+        self.labelNewTask = QLabel("NEW TASK:")
+        self.labelNewTask.setObjectName("newTaskLabel")
+        formLayout.addWidget(self.labelNewTask, 0, 1, Qt.AlignmentFlag.AlignCenter)
+        self.titleEntry = QLineEdit()
+        self.titleEntry.setPlaceholderText("title")
+        formLayout.addWidget(self.titleEntry, 1, 0, Qt.AlignmentFlag.AlignCenter)
+        self.descEntry = QLineEdit()
+        self.descEntry.setPlaceholderText("description")
+        self.descEntry.setObjectName("descEntry")
+        formLayout.addWidget(self.descEntry, 1, 1, Qt.AlignmentFlag.AlignCenter)
+        self.timeEntry = QDateTimeEdit()
+        formLayout.addWidget(self.timeEntry, 1, 2, Qt.AlignmentFlag.AlignCenter)
+        self.remindEntry = QComboBox()
+        for label, lead in reminders.LEAD_TIMES:
+            self.remindEntry.addItem(label, lead)
+        formLayout.addWidget(self.remindEntry, 2, 0, Qt.AlignmentFlag.AlignCenter)
+        self.repeatEntry = QComboBox()
+        for label, rule in recurrence.PRESETS:
+            self.repeatEntry.addItem(label, rule)
+        formLayout.addWidget(self.repeatEntry, 2, 2, Qt.AlignmentFlag.AlignCenter)
+        formLayout.addWidget(iconButton("Accept", "acceptEdit", 50, 40, 30, self.acceptForm),
+                             1, 3, Qt.AlignmentFlag.AlignCenter)
+        formLayout.addWidget(iconButton("Cancel", "cancel", 50, 40, 30, self.cancelForm),
+                             1, 4, Qt.AlignmentFlag.AlignCenter)
+        formLayout.setColumnStretch(0, 1)
+        formLayout.setColumnStretch(1, 4)
+        formLayout.setColumnStretch(2, 2)
+        formLayout.setColumnStretch(3, 1)
+        formLayout.setColumnStretch(4, 1)
+        formLayout.setSpacing(0)
+        self.taskForm.setLayout(formLayout)
+        self.layout.addWidget(self.taskForm)
+
+        self.bottomBar = QWidget()
+        barLayout = QHBoxLayout()
+        barLayout.addWidget(transferButton(self, "tasks", self.updateData))
+        barLayout.addWidget(listsButton(self, lambda path: self.parent().parent().switchList(path)))
+        self.noTasksLabel = QLabel("No Tasks")
+        policy = self.noTasksLabel.sizePolicy()
+        policy.setRetainSizeWhenHidden(True)
+        self.noTasksLabel.setSizePolicy(policy)
+        barLayout.addWidget(self.noTasksLabel, 1, Qt.AlignmentFlag.AlignCenter)
+        barLayout.addWidget(iconButton("Add new task", "addBtn", 45, 45, 45, self.switchAdding))
+        barLayout.addWidget(iconButton("Completed tasks", "completed", 45, 45, 45,
+                                       self.switchScreenToFinishedTasks))
+        barLayout.setContentsMargins(0, 0, 0, 0)
+        self.bottomBar.setLayout(barLayout)
+        self.layout.addWidget(self.bottomBar)
+
+        self.layout.setSpacing(0)
+        self.setLayout(self.layout)
+        self.updateForm()
 
+        # the first updateData() runs once mainApp painted its first frame, SwitchScreen(0) refreshes the list when
+        # the screen comes back, so the timer only runs while it is shown
         self.timer = QTimer()
         self.timer.setInterval(5000)
         self.timer.timeout.connect(self.updateIfNotEditing)
+
+    def showEvent(self, event):
+        super(displayTasksScreen, self).showEvent(event)
         self.timer.start()
 
+    def hideEvent(self, event):
+        super(displayTasksScreen, self).hideEvent(event)
+        self.timer.stop()
+
+    def showList(self, title):
+        """Forget the list shown so far, the next updateData() loads the one `repository` switched to."""
+        self.title = title
+        self.editedId = -1
+        self.addingNewTask = False
+        self.revision = None
+        self.switchStarted = time.perf_counter()
+        self.searchEntry.clear()
+        self.showModel(self.model)
+        # the ids of the old rows mean other tasks of the new list, they are gone until its tasks arrive
+        self.model.setTasks([])
+        self.tasksChanged.emit([], None)
+        self.updateForm()
+
     def updateIfNotEditing(self):
         if self.editedId == -1 and self.addingNewTask is False: self.updateData()
 
     def updateData(self):
-        print("UPDATING")
-        children = []
-        for i in range(self.layout.count()):
-            child = self.layout.itemAt(i).widget()
-            if child:
-                children.append(child)
-        for child in children:
-            if child:
-                child.deleteLater()
-        if self.editedId == -1:
-            headerMain = QLabel("TO DO LIST")
-            headerMain.setStyleSheet("font-size:22pt; font-weight:600; text-align:center; text-decoration:underline;")
+        perf.profiler.start()
+        started = time.perf_counter()
+        repository.call("activeTaskChanges", self.revision, callback=lambda result: self.setTasks(result, started))
+        self.updateForm()
+
+    def setTasks(self, result, started):
+        self.revision, rows, changed = result
+        rowCount = self.model.rowCount()
+        with perf.measure("model.apply"):
+            if changed is None:
+                self.model.setTasks(rows)
+            elif changed:
+                self.model.applyChanges(rows, changed)
+        if changed != set(): self.tasksChanged.emit(rows, changed)
+        if changed != set() and ftsQuery(self.searchEntry.text()):
+            self.search()
+        self.updateForm()
+        if rowCount != self.model.rowCount() and self.isVisible(): self.parent().parent().SwitchSize(0)
+        perf.record("refresh.updateData", started)
+        if self.switchStarted is not None and changed is None:
+            perf.record("switch.list", self.switchStarted)
+            self.switchStarted = None
+        perf.profiler.stop()
+        if not self.loaded:
+            self.loaded = True
+            reportStartup()
+
+    def search(self):
+        text = self.searchEntry.text()
+        if ftsQuery(text):
+            repository.call("searchTaskIds", text, callback=lambda ids: self.showSearchResults(text, ids))
         else:
-            headerMain = QLabel("EDITING...")
-            headerMain.setStyleSheet("font-size:30pt; font-weight:600; text-align:center;color:blue")
-
-        self.layout.addWidget(headerMain, 0, 1, Qt.AlignmentFlag.AlignCenter)
-        lastindex = -1
-        for i, task in enumerate(cur.execute(
-                "SELECT title, text_content, time_limit, rowid FROM tasks ORDER BY time_limit")):
-            if i > lastindex: lastindex = i
-            taskDeadline = datetime.datetime.strptime(task[2][:19], "%Y-%m-%d %H:%M:%S")
-            if task[3] == self.editedId:
-                titleEntry = QLineEdit()
-                descEntry = QLineEdit()
-                timeEntry = QDateTimeEdit()
-
-                titleEntry.setText(task[0])
-                self.layout.addWidget(titleEntry, i + 1, 0, Qt.AlignmentFlag.AlignCenter)
-
-                descEntry.setText(task[1])
-                descEntry.setStyleSheet("width:350px")
-                self.layout.addWidget(descEntry, i + 1, 1, Qt.AlignmentFlag.AlignCenter)
-
-                timeEntry.setDateTime(QDateTime.fromString(task[2][:19], "yyyy-MM-dd hh:mm:ss"))
-                timeEntry.setMinimumDateTime(QDateTime.currentDateTime().addSecs(-3600))
-                self.layout.addWidget(timeEntry, i + 1, 2, Qt.AlignmentFlag.AlignCenter)
-
-                cancelEditingBtn = QPushButton("")
-                acceptEditBtn = QPushButton("")
-
-                cancelEditingBtn.setToolTip("Cancel")
-                cancelEditingBtn.setFixedSize(50, 40)
-                cancelEditingBtn.setIconSize(QSize(30, 30))
-                cancelEditingBtn.setIcon(QIcon("img/cancel.png"))
-                cancelEditingBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-                cancelEditingBtn.clicked.connect(self.cancelEditing)
-                cancelEditingBtn.setStyleSheet("border:none;")
-                self.layout.addWidget(cancelEditingBtn, i + 1, 4, Qt.AlignmentFlag.AlignCenter)
-
-                acceptEditBtn.setToolTip("Accept")
-                acceptEditBtn.setFixedSize(50, 40)
-                acceptEditBtn.setIconSize(QSize(30, 30))
-                acceptEditBtn.setIcon(QIcon("img/acceptEdit.png"))
-                acceptEditBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-                acceptEditBtn.clicked.connect(
-                    lambda: self.acceptEditing(titleEntry, descEntry, timeEntry, self.editedId))
-                acceptEditBtn.setStyleSheet("border:none;")
-                self.layout.addWidget(acceptEditBtn, i + 1, 3, Qt.AlignmentFlag.AlignCenter)
+            self.showModel(self.model)
+
+    def showSearchResults(self, text, ids):
+        if text == self.searchEntry.text():
+            self.proxy.setIds(ids)
+            self.showModel(self.proxy)
+
+    def showModel(self, model):
+        """Show the tasks straight from the model, or filtered through the proxy while searching. The proxy only
+        follows the model while it is shown, it remaps all its rows on every row the model moves."""
+        if self.view.model() is not model:
+            self.proxy.setSourceModel(self.model if model is self.proxy else None)
+            self.view.setModel(model)
+        self.view.horizontalHeader().setSectionResizeMode(TaskTableModel.DESCRIPTION, QHeaderView.ResizeMode.Stretch)
+        self.view.setColumnWidth(TaskTableModel.TITLE, 180)
+        self.view.setColumnWidth(TaskTableModel.COUNTDOWN, 200)
+        for column in (TaskTableModel.FINISH, TaskTableModel.EDIT, TaskTableModel.DELETE):
+            self.view.setColumnWidth(column, 50)
+
+    def updateForm(self):
+        self.headerMain.setText(self.title if self.editedId == -1 else "EDITING...")
+        setStyleProperty(self.headerMain, "editing", self.editedId != -1)
+        formShown = self.addingNewTask or self.editedId != -1
+        self.taskForm.setVisible(formShown)
+        self.labelNewTask.setVisible(self.addingNewTask)
+        self.bottomBar.setVisible(not formShown)
+        self.noTasksLabel.setVisible(self.loaded and self.model.rowCount() == 0)
+
+    def taskClicked(self, index):
+        if self.switchStarted is not None:
+            return
+        rowid = index.data(TaskTableModel.TaskIdRole)
+        if index.column() == TaskTableModel.DELETE:
+            self.deleteTask(rowid)
+        elif index.data(TaskTableModel.LateRole):
+            return
+        elif index.column() == TaskTableModel.FINISH:
+            self.finishTask(rowid)
+        elif index.column() == TaskTableModel.EDIT:
+            self.setEditedId(rowid)
+
+    def taskHovered(self, index):
+        viewport = self.view.viewport()
+        if index.column() == TaskTableModel.DELETE:
+            viewport.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+        elif index.column() in (TaskTableModel.FINISH, TaskTableModel.EDIT):
+            if index.data(TaskTableModel.LateRole):
+                viewport.setCursor(resources.cursor(Qt.CursorShape.ForbiddenCursor))
             else:
-                delta = (taskDeadline - datetime.datetime.now()).total_seconds()
-                late = False
-                if (delta < 0): late = True
-                self.layout.addWidget(self.generateTimeLabel(delta), i + 1, 2, Qt.AlignmentFlag.AlignCenter)
-
-                title = QLabel(task[0])
-                if not late:
-                    title.setStyleSheet("font-size:17pt; color: black")
-                else:
-                    title.setStyleSheet("font-size:17pt; color: #bd0000")
-                self.layout.addWidget(title, i + 1, 0, Qt.AlignmentFlag.AlignCenter)
-
-                descText = task[1]
-                if len(descText) >= 43:
-                    descText = descText[:40] + "..."
-                desc = QLabel(descText)
-                if not late:
-                    desc.setStyleSheet("font-size:15pt; color: #303030")
-                else:
-                    desc.setStyleSheet("font-size:15pt; color: red")
-                self.layout.addWidget(desc, i + 1, 1, Qt.AlignmentFlag.AlignCenter)
-
-                finishTaskBtn = QPushButton('')
-                editTaskBtn = QPushButton('')
-                delTaskBtn = QPushButton('')
-
-                for button in [finishTaskBtn, editTaskBtn, delTaskBtn]:
-                    button.setStyleSheet("border:none;")
-                    button.setFixedSize(50, 40)
-                    button.setIconSize(QSize(40, 40))
-
-                delTaskBtn.setToolTip("Delete")
-                delTaskBtn.clicked.connect(lambda state=None, x=task[3]: self.deleteTask(x))
-                delTaskBtn.setIcon(QIcon("img/delBtn.png"))
-                delTaskBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-
-                if not late:
-                    finishTaskBtn.setToolTip("Mark as finished")
-                    finishTaskBtn.clicked.connect(lambda state=None, x=task[3]: self.finishTask(x))
-                    finishTaskBtn.setIcon(QIcon("img/doneBtn.png"))
-                    finishTaskBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-
-                    editTaskBtn.setToolTip("Edit")
-                    editTaskBtn.clicked.connect(lambda state=None, x=task[3]: self.setEditedId(x))
-
-                    editTaskBtn.setIcon(QIcon("img/editBtn.png"))
-                    editTaskBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-
-                else:
-                    finishTaskBtn.setIcon(QIcon("img/doneBtnGrey.png"))
-                    finishTaskBtn.setCursor(QCursor(Qt.CursorShape.ForbiddenCursor))
-
-                    editTaskBtn.setIcon(QIcon("img/editBtnGrey.png"))
-                    editTaskBtn.setCursor(QCursor(Qt.CursorShape.ForbiddenCursor))
-
-                self.layout.addWidget(finishTaskBtn, i + 1, 3)
-                self.layout.addWidget(editTaskBtn, i + 1, 4)
-                self.layout.addWidget(delTaskBtn, i + 1, 5)
-
-        if self.addingNewTask is False and self.editedId == -1:
-            addTaskBtn = QPushButton("")
-            addTaskBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-            addTaskBtn.clicked.connect(self.switchAdding)
-            addTaskBtn.setToolTip("Add new task")
-            addTaskBtn.setFixedSize(45, 45)
-            addTaskBtn.setIconSize(QSize(45, 45))
-            addTaskBtn.setIcon(QIcon("img/addBtn.png"))
-            addTaskBtn.setStyleSheet("border:none;")
-            self.layout.addWidget(addTaskBtn, lastindex + 2, 4, Qt.AlignmentFlag.AlignCenter)
-
-            completedTasksBtn = QPushButton("")
-
-            completedTasksBtn.setToolTip("Completed tasks")
-            completedTasksBtn.setFixedSize(45, 45)
-            completedTasksBtn.setIconSize(QSize(45, 45))
-            completedTasksBtn.setIcon(QIcon("img/completed.png"))
-            completedTasksBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-            completedTasksBtn.clicked.connect(self.switchScreenToFinishedTasks)
-            completedTasksBtn.setStyleSheet("border:none;")
-            self.layout.addWidget(completedTasksBtn, lastindex + 2, 5, Qt.AlignmentFlag.AlignCenter)
-
-            if lastindex == -1:
-                self.layout.addWidget(QLabel("No Tasks"), lastindex + 2, 1, Qt.AlignmentFlag.AlignCenter)
-        elif self.addingNewTask and self.editedId == -1:
-            labelNewTask = QLabel("NEW TASK:")
-            labelNewTask.setStyleSheet("color:#ffb72c; font-weight:600; margin-top:25px")
-            self.layout.addWidget(labelNewTask, lastindex + 2, 1, Qt.AlignmentFlag.AlignCenter)
-            titleEntry = QLineEdit()
-            descEntry = QLineEdit()
-            timeEntry = QDateTimeEdit()
-            titleEntry.setPlaceholderText("title")
-            self.layout.addWidget(titleEntry, lastindex + 3, 0, Qt.AlignmentFlag.AlignCenter)
-            descEntry.setPlaceholderText("description")
-            descEntry.setStyleSheet("width:350px")
-            self.layout.addWidget(descEntry, lastindex + 3, 1, Qt.AlignmentFlag.AlignCenter)
-            timeEntry.setDateTime(QDateTime.currentDateTime().addDays(2))
-            timeEntry.setMinimumDateTime(QDateTime.currentDateTime().addSecs(-3600))
-            self.layout.addWidget(timeEntry, lastindex + 3, 2, Qt.AlignmentFlag.AlignCenter)
-
-            cancelAddingBtn = QPushButton("")
-            acceptAddingBtn = QPushButton("")
-
-            cancelAddingBtn.setToolTip("Cancel")
-            cancelAddingBtn.setFixedSize(50, 40)
-            cancelAddingBtn.setIconSize(QSize(30, 30))
-            cancelAddingBtn.setIcon(QIcon("img/cancel.png"))
-            cancelAddingBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-            cancelAddingBtn.clicked.connect(self.switchAdding)
-            cancelAddingBtn.setStyleSheet("border:none;")
-            self.layout.addWidget(cancelAddingBtn, lastindex + 3, 4, Qt.AlignmentFlag.AlignCenter)
-
-            acceptAddingBtn.setToolTip("Accept")
-            acceptAddingBtn.setFixedSize(50, 40)
-            acceptAddingBtn.setIconSize(QSize(30, 30))
-            acceptAddingBtn.setIcon(QIcon("img/acceptEdit.png"))
-            acceptAddingBtn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-            acceptAddingBtn.clicked.connect(
-                lambda: self.addTask(titleEntry, descEntry, timeEntry))
-            acceptAddingBtn.setStyleSheet("border:none;")
-            self.layout.addWidget(acceptAddingBtn, lastindex + 3, 3, Qt.AlignmentFlag.AlignCenter)
+                viewport.setCursor(resources.cursor(Qt.CursorShape.PointingHandCursor))
+        else:
+            viewport.unsetCursor()
 
-        self.layout.setColumnStretch(0, 1)
-        self.layout.setColumnStretch(1, 4)
-        self.layout.setColumnStretch(2, 2)
-        self.layout.setColumnStretch(3, 1)
-        self.layout.setColumnStretch(4, 1)
-        self.layout.setColumnStretch(5, 1)
-        if lastindex == -1:
-            self.layout.setColumnStretch(0, 1)
-            self.layout.setColumnStretch(1, 9)
-            self.layout.setColumnStretch(2, 0)
-            self.layout.setColumnStretch(3, 0)
-            self.layout.setColumnStretch(4, 1)
-            self.layout.setColumnStretch(5, 1)
-        self.layout.setSpacing(0)
-        self.setLayout(self.layout)
-        self.update()
+    def acceptForm(self):
+        if self.editedId != -1:
+            self.acceptEditing(self.titleEntry, self.descEntry, self.timeEntry, self.editedId)
+        else:
+            self.addTask(self.titleEntry, self.descEntry, self.timeEntry)
+
+    def cancelForm(self):
+        if self.editedId != -1:
+            self.cancelEditing()
+        else:
+            self.switchAdding()
 
     def addTask(self, title, desc, timedata):
         if len(title.text()) < 1:
@@ -393,16 +714,20 @@ class displayTasksScreen(QWidget):
         elif timedata.dateTime().secsTo(QDateTime.currentDateTime()) > 0:
             QMessageBox.critical(self, "Error", "Incorrect deadline!")
         else:
-            cur.execute(f"""
-                INSERT INTO tasks VALUES ('{title.text()}', '{desc.text()}', '{timedata.dateTime().toPython()}')
-            """)
-            con.commit()
-            self.parent().parent().SwitchSize(0)
+            repository.call("addTask", title.text(), desc.text(), timedata.dateTime().toSecsSinceEpoch(),
+                            self.repeatEntry.currentData(), self.remindEntry.currentData())
             self.switchAdding()
 
     def switchAdding(self):
         self.addingNewTask = not self.addingNewTask
         if self.addingNewTask and self.editedId != -1: self.cancelEditing()
+        if self.addingNewTask:
+            self.titleEntry.clear()
+            self.descEntry.clear()
+            self.timeEntry.setDateTime(QDateTime.currentDateTime().addDays(2))
+            self.timeEntry.setMinimumDateTime(QDateTime.currentDateTime().addSecs(-3600))
+            self.setRepeatRule(None)
+            self.setLeadTime(None)
         self.updateData()
 
     def acceptEditing(self, titleEntry, descEntry, timeEntry, rowid):
@@ -413,10 +738,9 @@ class displayTasksScreen(QWidget):
         elif timeEntry.dateTime().secsTo(QDateTime.currentDateTime()) > 0:
             QMessageBox.critical(self, "Error", "Incorrect deadline!")
         else:
-            cur.execute(f"""
-                UPDATE tasks SET title='{titleEntry.text()}', text_content='{descEntry.text()}', time_limit='{timeEntry.dateTime().toPython()}' WHERE rowid={rowid}
-            """)
-            con.commit()
+            repository.call("updateTask", rowid, titleEntry.text(), descEntry.text(),
+                            timeEntry.dateTime().toSecsSinceEpoch(), self.repeatEntry.currentData(),
+                            self.remindEntry.currentData())
             self.cancelEditing()
 
     def cancelEditing(self):
@@ -426,70 +750,70 @@ class displayTasksScreen(QWidget):
     def setEditedId(self, rowid):
         if self.addingNewTask: self.switchAdding()
         self.editedId = rowid
+        task = self.model.task(self.model.rowOfTask(rowid))
+        self.titleEntry.setText(task[1])
+        self.descEntry.setText(task[2])
+        self.timeEntry.setDateTime(QDateTime.fromSecsSinceEpoch(task[3]))
+        self.timeEntry.setMinimumDateTime(QDateTime.currentDateTime().addSecs(-3600))
+        self.setRepeatRule(task[4])
+        self.setLeadTime(task[5])
         self.updateData()
 
+    def setRepeatRule(self, rule):
+        # a rule none of the presets offers (set outside the form) gets an entry of its own
+        if self.repeatEntry.findData(rule) == -1:
+            self.repeatEntry.addItem(rule, rule)
+        self.repeatEntry.setCurrentIndex(self.repeatEntry.findData(rule))
+
+    def setLeadTime(self, lead):
+        if self.remindEntry.findData(lead) == -1:
+            self.remindEntry.addItem(reminders.leadTimeLabel(lead), lead)
+        self.remindEntry.setCurrentIndex(self.remindEntry.findData(lead))
+
     def finishTask(self, rowid):
-        theTask = cur.execute("SELECT * FROM tasks WHERE rowid=" + str(rowid)).fetchone()
-        cur.execute("DELETE FROM tasks WHERE rowid=" + str(rowid))
-        cur.execute(
-            f"INSERT INTO finished_tasks VALUES ('{theTask[0]}','{theTask[1]}','{datetime.datetime.now()}')")
-        con.commit()
+        repository.call("finishTask", rowid)
         self.updateData()
 
     def switchScreenToFinishedTasks(self):
         self.parent().parent().SwitchScreen(1)
 
     def deleteTask(self, rowid):
-        cur.execute("DELETE FROM tasks WHERE rowid=" + str(rowid))
-        con.commit()
-        self.parent().parent().SwitchSize(0)
+        repository.call("deleteTask", rowid)
         self.updateData()
 
-    @staticmethod
-    def generateTimeLabel(delta):
-        if delta > 86400:  # more than 24 hours
-            style = "color: #292929"
-            labelText = str(round(delta / 86400)) + " days left"
-            if round(delta / 86400) < 2:
-                labelText = "1 day left"
-        elif delta > 3600:  # more than 1 hour
-            style = ""
-            labelText = str(round(delta / 3600)) + " hours left"
-            if round(delta / 3600) < 2:
-                labelText = "1 hour left"
-        elif delta > 0:
-            style = "color:#bd7800; font-weight:600"
-            labelText = str(round(delta / 60)) + " minutes left"
-            if round(delta / 60) < 2:
-                labelText = "1 minute left"
-        elif delta > -3600:
-            style = "color:#ff1f1f; font-weight:600;"
-            labelText = str(abs(round(delta / 60))) + " minutes late!"
-            if abs(round(delta / 60)) < 2:
-                labelText = "1 minute late!"
-        elif delta > -86400:
-            style = "color:#ff1f1f; font-weight:600"
-            labelText = str(abs(round(delta / 3600))) + " hours late!"
-            if abs(round(delta / 3600)) < 2:
-                labelText = "1 hour late!"
-                labelText = "1 hour late!"
-        else:
-            style = "color:#ff1f1f; font-weight:600"
-            labelText = str(abs(round(delta / 86400))) + " days late!"
-            if abs(round(delta / 86400)) < 2:
-                labelText = "1 day late!"
-        timeLeft = QLabel(labelText)
-        timeLeft.setStyleSheet("font-size:13pt; " + style)
-        return timeLeft
-
     def calcHeight(self):
-        return len(cur.execute("SELECT * FROM tasks").fetchall()) * 45 + 180
+        return self.model.rowCount() * 45 + 180
+
+
+def reportStartup():
+    """Record when the task list was first shown. With TODO_PERF_STARTUP set, print the startup times and quit."""
+    perf.record("startup.tasksShown", STARTED, logSlow=False)
+    if os.environ.get("TODO_PERF_STARTUP"):
+        for name, entry in perf.stats("startup.").items():
+            print(f"{name}: {entry['p50']:.1f} ms")
+        QApplication.quit()
+
+
+def main():
+    global repository
+    app = QApplication(sys.argv)
+    repository = DbClient(DEFAULT_LIST)
 
+    window = mainApp()
+    # reopen the list used last, its tasks are loaded after the first frame like those of the default list
+    path = window.settings.value("list", DEFAULT_LIST)
+    if path != repository.path and os.path.exists(path): window.openList(path)
+    if "--minimized" in sys.argv[1:]:
+        # nothing is painted, so the tasks (and their reminders) are loaded right away
+        if window.tray is None: window.showMinimized()
+        window.display_widget.updateData()
+    else:
+        window.show()
 
-app = QApplication(sys.argv)
+    app.exec()
+    repository.close()
+    if os.environ.get("TODO_PERF_DUMP"): perf.dump(os.environ["TODO_PERF_DUMP"])
 
-window = mainApp()
-window.show()
 
-app.exec()
-con.close()
+if __name__ == "__main__":
+    main()
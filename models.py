@@ -0,0 +1,439 @@
+import bisect
+import math
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PySide6.QtGui import QColor, QFont
+
+import resources
+from recurrence import presetLabel
+from scheduler import DeadlineScheduler
+
+# (delta lower bound, unit in seconds, unit name, colour, bold) - first bucket with delta > bound wins
+TIME_BUCKETS = (
+    (86400, 86400, "day", "#292929", False),
+    (3600, 3600, "hour", None, False),
+    (0, 60, "minute", "#bd7800", True),
+    (-3600, 60, "minute", "#ff1f1f", True),
+    (-86400, 3600, "hour", "#ff1f1f", True),
+    (float("-inf"), 86400, "day", "#ff1f1f", True),
+)
+
+
+def timeLabel(delta):
+    """Return (text, colour, bold) of the countdown label for a deadline `delta` seconds away."""
+    for lower, unit, name, colour, bold in TIME_BUCKETS:
+        if delta > lower:
+            amount = abs(round(delta / unit))
+            suffix = " left" if delta > 0 else " late!"
+            if amount < 2:
+                return "1 " + name + suffix, colour, bold
+            return str(amount) + " " + name + "s" + suffix, colour, bold
+
+
+def nextLabelChange(deadline, now):
+    """Return the epoch time after `now` at which timeLabel() of the epoch `deadline` next changes.
+
+    The time is rounded up to a grid of a quarter of the label's unit (one second when the task turns late), so
+    the labels counting days of many tasks change together a few times a day instead of once per task.
+    """
+    delta = deadline - now
+    for bucket, (lower, unit, name, colour, bold) in enumerate(TIME_BUCKETS):
+        if delta > lower:
+            boundary = max((round(delta / unit) - 0.5) * unit, lower)
+            break
+    wake = deadline - boundary
+    if boundary != lower:
+        wake += 0.5  # step past the rounding tie
+    else:
+        unit = min(unit, TIME_BUCKETS[bucket + 1][1])  # moving into the next bucket, use the finer unit
+    quantum = 1 if boundary == 0 else unit / 4
+    return max(math.ceil(wake / quantum) * quantum, now + 1)
+
+
+def timeAgoLabel(delta):
+    if delta > 86400:
+        return str(round(delta / 86400)) + " days ago"
+    elif delta > 3600:
+        return str(round(delta / 3600)) + " hours ago"
+    elif delta > 60:
+        return str(round(delta / 60)) + " minutes ago"
+    else:
+        return "1 minute ago"
+
+
+def shortDescription(text):
+    if len(text) >= 43:
+        return text[:40] + "..."
+    return text
+
+
+class TaskTableModel(QAbstractTableModel):
+    """Active tasks ordered by deadline, one row per task and one column per cell of the old grid."""
+
+    TITLE, DESCRIPTION, COUNTDOWN, FINISH, EDIT, DELETE = range(6)
+    TaskIdRole = Qt.ItemDataRole.UserRole
+    LateRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super(TaskTableModel, self).__init__(parent)
+
+        # rows sorted by (deadline, id), a row is found by bisecting _keys and every edit is one insert, move or
+        # remove of the three lists
+        self._tasks = []  # (id, title, text_content, deadline, recurrence rule, reminder lead) rows of activeTasks()
+        self._keys = []  # (deadline, id) of every row
+        self._labels = []  # timeLabel() of every row
+        self._byId = {}  # rowid -> task
+
+        self.scheduler = DeadlineScheduler(nextLabelChange, self)
+        self.scheduler.due.connect(self.refreshRows)
+
+        self._icons = {
+            (self.FINISH, False): resources.icon("doneBtn"),
+            (self.FINISH, True): resources.icon("doneBtnGrey"),
+            (self.EDIT, False): resources.icon("editBtn"),
+            (self.EDIT, True): resources.icon("editBtnGrey"),
+            (self.DELETE, False): resources.icon("delBtn"),
+            (self.DELETE, True): resources.icon("delBtn"),
+        }
+        self._tooltips = {self.FINISH: "Mark as finished", self.EDIT: "Edit", self.DELETE: "Delete"}
+
+        self._titleFont = QFont()
+        self._titleFont.setPointSize(17)
+        self._descFont = QFont()
+        self._descFont.setPointSize(15)
+        self._timeFont = QFont()
+        self._timeFont.setPointSize(13)
+        self._timeBoldFont = QFont(self._timeFont)
+        self._timeBoldFont.setWeight(QFont.Weight.DemiBold)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 6
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        task = self._tasks[row]
+        text, colour, bold = self._labels[row]
+        late = text.endswith("late!")
+
+        if role == self.TaskIdRole:
+            return task[0]
+        if role == self.LateRole:
+            return late
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.TITLE:
+                return task[1] + " \u21bb" if task[4] else task[1]
+            if column == self.DESCRIPTION:
+                return shortDescription(task[2])
+            if column == self.COUNTDOWN:
+                return text
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.TITLE:
+                return QColor("#bd0000" if late else "black")
+            if column == self.DESCRIPTION:
+                return QColor("red" if late else "#303030")
+            if column == self.COUNTDOWN:
+                return QColor(colour or "black")
+        elif role == Qt.ItemDataRole.FontRole:
+            if column == self.TITLE:
+                return self._titleFont
+            if column == self.DESCRIPTION:
+                return self._descFont
+            if column == self.COUNTDOWN:
+                return self._timeBoldFont if bold else self._timeFont
+        elif role == Qt.ItemDataRole.DecorationRole:
+            return self._icons.get((column, late))
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column == self.TITLE and task[4]:
+                return "Repeats: " + presetLabel(task[4])
+            if column == self.DESCRIPTION and task[2] != shortDescription(task[2]):
+                return task[2]
+            if column in self._tooltips and not (late and column != self.DELETE):
+                return self._tooltips[column]
+        return None
+
+    def task(self, row):
+        return self._tasks[row]
+
+    def rowOfTask(self, rowid):
+        task = self._byId.get(rowid)
+        return -1 if task is None else bisect.bisect_left(self._keys, (task[3], task[0]))
+
+    def setTasks(self, tasks):
+        """Replace all rows with `tasks` and reschedule their countdowns."""
+        self._replace(sorted(tasks, key=lambda task: (task[3], task[0])))
+        self.scheduler.reset((task[0], task[3]) for task in self._tasks)
+
+    def applyChanges(self, tasks, changedIds):
+        """Replace the rows whose rowid is in `changedIds` with `tasks`, ids missing from `tasks` were deleted.
+
+        Each change reaches the views as a row insert, move, remove or dataChanged of its own.
+        """
+        byId = {task[0]: task for task in tasks}
+        for rowid in changedIds:
+            task = byId.get(rowid)
+            if task is None:
+                self._remove(rowid)
+                self.scheduler.unschedule(rowid)
+            else:
+                if rowid in self._byId:
+                    self._update(task)
+                else:
+                    self._insert(task)
+                self.scheduler.schedule(rowid, task[3])
+
+    def refreshRows(self, rowids):
+        """Recompute the countdown of the given tasks, called by the scheduler when their label is due to change."""
+        now = time.time()
+        for rowid in rowids:
+            row = self.rowOfTask(rowid)
+            if row == -1:
+                continue
+            label = timeLabel(self._tasks[row][3] - now)
+            if label != self._labels[row]:
+                self._labels[row] = label
+                self.dataChanged.emit(self.index(row, 0), self.index(row, 5))
+
+    def _replace(self, tasks):
+        """Swap in `tasks`, emitting dataChanged only for rows whose content changed."""
+        now = time.time()
+        labels = [timeLabel(task[3] - now) for task in tasks]
+
+        if [task[0] for task in tasks] != [task[0] for task in self._tasks]:
+            self.beginResetModel()
+            self._tasks, self._labels = tasks, labels
+            self._keys = [(task[3], task[0]) for task in tasks]
+            self._byId = {task[0]: task for task in tasks}
+            self.endResetModel()
+            return
+
+        changed = [row for row in range(len(tasks))
+                   if tasks[row] != self._tasks[row] or labels[row] != self._labels[row]]
+        self._tasks, self._labels = tasks, labels
+        self._keys = [(task[3], task[0]) for task in tasks]
+        self._byId = {task[0]: task for task in tasks}
+        for row in changed:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, 5))
+
+    def _insert(self, task):
+        key = (task[3], task[0])
+        row = bisect.bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self._keys.insert(row, key)
+        self._labels.insert(row, timeLabel(task[3] - time.time()))
+        self._byId[task[0]] = task
+        self.endInsertRows()
+
+    def _remove(self, rowid):
+        row = self.rowOfTask(rowid)
+        if row == -1:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tasks[row], self._keys[row], self._labels[row]
+        del self._byId[rowid]
+        self.endRemoveRows()
+
+    def _update(self, task):
+        row = self.rowOfTask(task[0])
+        if task == self._tasks[row]:
+            return
+        key = (task[3], task[0])
+        label = timeLabel(task[3] - time.time())
+        self._byId[task[0]] = task
+        # the row before which the task goes, counted with the task still at its old row
+        target = bisect.bisect_left(self._keys, key)
+        if target not in (row, row + 1):
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), target)
+            del self._tasks[row], self._keys[row], self._labels[row]
+            row = target if target < row else target - 1
+            self._tasks.insert(row, task)
+            self._keys.insert(row, key)
+            self._labels.insert(row, label)
+            self.endMoveRows()
+        else:
+            self._tasks[row], self._keys[row], self._labels[row] = task, key, label
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 5))
+
+
+class FinishedTasksModel(QAbstractTableModel):
+    """Finished tasks in the order they were finished.
+
+    The model reports every row but only holds the pages the view asked for, at most MAX_PAGES of them. Pages are
+    fetched through the database thread, by (time_done, id) key after the previous page when that is known.
+    """
+
+    PAGE_SIZE = 100
+    MAX_PAGES = 20
+
+    def __init__(self, repository, parent=None):
+        super(FinishedTasksModel, self).__init__(parent)
+
+        self.repository = repository
+        self._count = 0
+        self._pages = OrderedDict()  # page -> rows, least recently used first
+        self._pageKeys = {0: None}  # page -> (time_done, id) of the last row before it
+        self._requested = set()
+        self._generation = 0  # bumped on reload so pages requested before it are dropped
+
+        self._font = QFont()
+        self._font.setPointSize(16)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.FontRole:
+            return self._font
+        task = self.task(index.row())
+        if task is None:
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return task[1]
+            if index.column() == 1:
+                return shortDescription(task[2])
+            return timeAgoLabel(time.time() - task[3])
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == 1 and task[2] != shortDescription(task[2]):
+            return task[2]
+        return None
+
+    def task(self, row):
+        """Return the task of `row`, or None while its page is still being fetched."""
+        page, offset = divmod(row, self.PAGE_SIZE)
+        rows = self._pages.get(page)
+        if rows is None:
+            self.requestPage(page)
+            return None
+        self._pages.move_to_end(page)
+        return rows[offset] if offset < len(rows) else None
+
+    def requestPage(self, page):
+        if page in self._requested:
+            return
+        self._requested.add(page)
+        self.repository.call(
+            "finishedPage", self._pageKeys.get(page), page * self.PAGE_SIZE, self.PAGE_SIZE,
+            callback=lambda rows, page=page, generation=self._generation: self._pageLoaded(page, generation, rows))
+
+    def reload(self, count):
+        """Forget the loaded pages after finished_tasks changed, the view fetches its visible rows again."""
+        self._newGeneration()
+        self._pages.clear()
+        self._pageKeys = {0: None}
+        if count > self._count:
+            self.beginInsertRows(QModelIndex(), self._count, count - 1)
+            self._count = count
+            self.endInsertRows()
+        elif count < self._count:
+            self.beginRemoveRows(QModelIndex(), count, self._count - 1)
+            self._count = count
+            self.endRemoveRows()
+        if count:
+            self.dataChanged.emit(self.index(0, 0), self.index(count - 1, 2))
+
+    def _newGeneration(self):
+        # replies to requests of an older generation are dropped, so they can't be waited for either
+        self._generation += 1
+        self._requested.clear()
+
+    def refreshTimes(self):
+        if self._count:
+            self.dataChanged.emit(self.index(0, 2), self.index(self._count - 1, 2))
+
+    def _pageLoaded(self, page, generation, rows):
+        if generation != self._generation:
+            return
+        self._requested.discard(page)
+        self._pages[page] = rows
+        if len(rows) == self.PAGE_SIZE:
+            self._pageKeys[page + 1] = (rows[-1][3], rows[-1][0])
+        while len(self._pages) > self.MAX_PAGES:
+            self._pages.popitem(last=False)
+        first = page * self.PAGE_SIZE
+        last = min(first + self.PAGE_SIZE, self._count) - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 2))
+
+
+class FinishedSearchModel(FinishedTasksModel):
+    """Finished tasks matching a search, newest first, appended a page at a time as the view scrolls down."""
+
+    def __init__(self, repository, parent=None):
+        super(FinishedSearchModel, self).__init__(repository, parent)
+
+        self.text = ""
+        self._rows = []
+        self._more = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def task(self, row):
+        return self._rows[row]
+
+    def search(self, text):
+        self._newGeneration()
+        self.text = text
+        self.beginResetModel()
+        self._rows = []
+        self._more = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._more and not self._requested
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._requested.add(len(self._rows))
+        self.repository.call(
+            "searchFinishedTasks", self.text, self._rows[-1][0] if self._rows else None, self.PAGE_SIZE,
+            callback=lambda rows, generation=self._generation: self._resultsLoaded(generation, rows))
+
+    def reload(self, count):
+        if self.text:
+            self.search(self.text)
+
+    def refreshTimes(self):
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 2), self.index(len(self._rows) - 1, 2))
+
+    def _resultsLoaded(self, generation, rows):
+        if generation != self._generation:
+            return
+        self._requested.clear()
+        self._more = len(rows) == self.PAGE_SIZE
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+
+class TaskFilterProxyModel(QSortFilterProxyModel):
+    """Shows only the active tasks whose id is in the set given to setIds(), or all of them for None."""
+
+    def __init__(self, parent=None):
+        super(TaskFilterProxyModel, self).__init__(parent)
+
+        self._ids = None
+
+    def setIds(self, ids):
+        self._ids = None if ids is None else set(ids)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        return self._ids is None or self.sourceModel().task(sourceRow)[0] in self._ids
@@ -0,0 +1,155 @@
+"""Timing of the hot paths: database queries, screen construction, refreshes, layout and paint.
+
+Every measured operation keeps its latest durations in a ring buffer, so the percentiles describe recent behaviour and
+memory stays bounded however long the app runs. Operations slower than a threshold are logged as they happen.
+
+Environment variables:
+    TODO_PERF_SLOW_MS   log operations slower than this many milliseconds (default 100)
+    TODO_PERF_OVERLAY   show the overlay from the start (F12 toggles it, Shift+F12 prints the statistics)
+    TODO_PERF_DUMP      write the statistics as JSON to this file when the app exits
+    TODO_PERF_STARTUP   print the time to the first frame and to the first shown task list, then quit
+    TODO_PROFILE        capture a cProfile of this many refresh cycles of the task list
+    TODO_PROFILE_DIR    directory the .prof files are written to (default "profiles")
+"""
+import collections
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QLabel
+
+RING_SIZE = 512
+SLOW_MS = float(os.environ.get("TODO_PERF_SLOW_MS", 100))
+
+log = logging.getLogger("todo.perf")
+
+# the database thread records its queries too
+_lock = threading.Lock()
+_samples = {}  # operation name -> deque of the latest durations in ms
+_counts = collections.Counter()
+
+
+def record(name, started, logSlow=True):
+    """Record the time elapsed since `started` (a time.perf_counter() value) under `name`, returns it in ms.
+
+    Times that don't measure a single operation, like those from process start, pass logSlow=False.
+    """
+    ms = (time.perf_counter() - started) * 1000
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = collections.deque(maxlen=RING_SIZE)
+        samples.append(ms)
+        _counts[name] += 1
+    if logSlow and ms >= SLOW_MS:
+        log.warning("slow %s: %.1f ms", name, ms)
+    return ms
+
+
+@contextlib.contextmanager
+def measure(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, started)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def stats(prefix=""):
+    """{name: {count, p50, p99, max}} of the operations whose name starts with `prefix`, times in ms."""
+    with _lock:
+        snapshot = {name: sorted(samples) for name, samples in _samples.items() if name.startswith(prefix)}
+        counts = dict(_counts)
+    return {name: {"count": counts[name], "p50": percentile(samples, 0.5), "p99": percentile(samples, 0.99),
+                   "max": samples[-1]}
+            for name, samples in sorted(snapshot.items())}
+
+
+def report():
+    lines = [f"{'operation':<30}{'count':>7}{'p50 ms':>9}{'p99 ms':>9}"]
+    for name, entry in stats().items():
+        lines.append(f"{name:<30}{entry['count']:>7}{entry['p50']:>9.1f}{entry['p99']:>9.1f}")
+    return "\n".join(lines)
+
+
+def dump(path):
+    import json
+    with open(path, "w") as file:
+        json.dump(stats(), file, indent=2)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counts.clear()
+
+
+class RefreshProfiler:
+    """Profiles the next `cycles` refresh cycles with cProfile and writes each to `directory`/refresh-<n>.prof.
+
+    Only the GUI thread is profiled, the time spent in queries shows up as query.* in the statistics.
+    """
+
+    def __init__(self, cycles, directory):
+        self.remaining = cycles
+        self.directory = directory
+        self.written = 0
+        self._profile = None
+
+    def start(self):
+        if self.remaining > 0 and self._profile is None:
+            import cProfile  # only loaded when profiling
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is None:
+            return
+        self._profile.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        self.written += 1
+        path = os.path.join(self.directory, f"refresh-{self.written}.prof")
+        self._profile.dump_stats(path)
+        log.warning("wrote %s", path)
+        self._profile = None
+        self.remaining -= 1
+
+
+profiler = RefreshProfiler(int(os.environ.get("TODO_PROFILE", 0)), os.environ.get("TODO_PROFILE_DIR", "profiles"))
+
+
+class PerfOverlay(QLabel):
+    """Translucent box in the top right corner of its parent listing the latencies of the measured operations."""
+
+    def __init__(self, parent):
+        super(PerfOverlay, self).__init__(parent)
+
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background-color:rgba(0, 0, 0, 170); color:white; font-family:monospace; font-size:9pt;"
+                           "padding:6px")
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.timer.start()
+
+    def refresh(self):
+        self.setText(report())
+        self.adjustSize()
+        self.move(self.parent().width() - self.width() - 8, 8)
+        self.raise_()
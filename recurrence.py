@@ -0,0 +1,124 @@
+"""Recurrence rules of repeating tasks, a subset of the iCalendar RRULE syntax:
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY[;INTERVAL=n][;BYDAY=MO,TU,...][;COUNT=n][;UNTIL=yyyymmdd[Thhmmss]]
+
+Occurrences are counted from the first deadline of the series in local wall-clock time, so a task due every day at
+9:00 stays at 9:00 across daylight saving changes. BYDAY only applies to weekly rules. Monthly and yearly rules on
+a day a month doesn't have (the 31st, February 29th) fall on the last day of that month.
+"""
+import calendar
+import datetime
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# (label, rule) choices offered by the task form
+PRESETS = [
+    ("Does not repeat", None),
+    ("Every day", "FREQ=DAILY"),
+    ("Every weekday", "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR"),
+    ("Every week", "FREQ=WEEKLY"),
+    ("Every month", "FREQ=MONTHLY"),
+    ("Every year", "FREQ=YEARLY"),
+]
+
+
+class Recurrence:
+    """A parsed rule, raises ValueError for anything outside the supported subset."""
+
+    def __init__(self, rule):
+        self.rule = rule
+        parts = {}
+        for part in rule.upper().split(";"):
+            name, separator, value = part.strip().partition("=")
+            if not separator or not value:
+                raise ValueError(f"invalid recurrence rule {rule!r}")
+            parts[name] = value
+
+        self.frequency = parts.pop("FREQ", None)
+        if self.frequency not in FREQUENCIES:
+            raise ValueError(f"recurrence rule {rule!r} needs FREQ={'|'.join(FREQUENCIES)}")
+        self.interval = self._positive(parts.pop("INTERVAL", "1"))
+        self.count = self._positive(parts.pop("COUNT")) if "COUNT" in parts else None
+        self.until = self._until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+        days = parts.pop("BYDAY", None)
+        if days is not None and self.frequency != "WEEKLY":
+            raise ValueError(f"recurrence rule {rule!r}: BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            self.weekdays = sorted({WEEKDAYS.index(day) for day in days.split(",")}) if days else None
+        except ValueError:
+            raise ValueError(f"recurrence rule {rule!r}: BYDAY takes {','.join(WEEKDAYS)}") from None
+        if parts:
+            raise ValueError(f"recurrence rule {rule!r}: {', '.join(parts)} not supported")
+
+    def _positive(self, value):
+        if not value.isdigit() or int(value) < 1:
+            raise ValueError(f"recurrence rule {self.rule!r}: {value!r} is not a positive number")
+        return int(value)
+
+    def _until(self, value):
+        for format in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+            try:
+                until = datetime.datetime.strptime(value.rstrip("Z"), format)
+            except ValueError:
+                continue
+            # a date alone includes the whole day
+            return until.timestamp() + (86399 if format == "%Y%m%d" else 0)
+        raise ValueError(f"recurrence rule {self.rule!r}: UNTIL takes yyyymmdd or yyyymmddThhmmss")
+
+    def nextOccurrence(self, start, after, occurrences):
+        """Epoch seconds of the first occurrence later than `after` of a series starting at `start` that already
+        had `occurrences` occurrences, or None when the series is over."""
+        if self.count is not None and occurrences >= self.count:
+            return None
+        first = datetime.datetime.fromtimestamp(start)
+        moment = datetime.datetime.fromtimestamp(max(after, start))
+        if self.frequency == "DAILY":
+            candidate = self._daily(first, moment)
+        elif self.frequency == "WEEKLY":
+            candidate = self._weekly(first, moment)
+        else:
+            candidate = self._monthly(first, moment, self.interval * (12 if self.frequency == "YEARLY" else 1))
+        candidate = int(candidate.timestamp())
+        if self.until is not None and candidate > self.until:
+            return None
+        return candidate
+
+    def _daily(self, first, moment):
+        # jump straight to the period of `moment`, the loop only steps over its last one or two occurrences
+        step = max(0, (moment.date() - first.date()).days // self.interval)
+        while True:
+            candidate = first + datetime.timedelta(days=step * self.interval)
+            if candidate > moment:
+                return candidate
+            step += 1
+
+    def _weekly(self, first, moment):
+        weekdays = self.weekdays or [first.weekday()]
+        monday = first - datetime.timedelta(days=first.weekday())
+        week = max(0, (moment.date() - monday.date()).days // 7 // self.interval)
+        while True:
+            for weekday in weekdays:
+                candidate = monday + datetime.timedelta(days=week * self.interval * 7 + weekday)
+                if candidate > moment and candidate >= first:
+                    return candidate
+            week += 1
+
+    def _monthly(self, first, moment, months):
+        elapsed = (moment.year - first.year) * 12 + moment.month - first.month
+        step = max(0, elapsed // months)
+        while True:
+            month = first.month - 1 + step * months
+            year, month = first.year + month // 12, month % 12 + 1
+            day = min(first.day, calendar.monthrange(year, month)[1])
+            candidate = first.replace(year=year, month=month, day=day)
+            if candidate > moment:
+                return candidate
+            step += 1
+
+
+def presetLabel(rule):
+    for label, presetRule in PRESETS:
+        if presetRule == rule:
+            return label
+    return rule
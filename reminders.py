@@ -0,0 +1,109 @@
+"""Reminders shown in the system tray some time before the deadline of a task.
+
+The reminders are scheduled from the task rows the task list already loads, one DeadlineScheduler keeps them in a
+heap with a single timer armed for the earliest, so pending reminders cost no polling whatever their number.
+"""
+import time
+
+from PySide6.QtCore import QObject, Qt
+from PySide6.QtWidgets import QMessageBox, QSystemTrayIcon
+
+from models import timeLabel
+from scheduler import DeadlineScheduler
+
+# (label, seconds before the deadline) choices offered by the task form
+LEAD_TIMES = [
+    ("No reminder", None),
+    ("At the deadline", 0),
+    ("5 minutes before", 300),
+    ("15 minutes before", 900),
+    ("1 hour before", 3600),
+    ("1 day before", 86400),
+]
+
+# more reminders than this due at once are shown as one message
+MAX_MESSAGES = 3
+
+
+def leadTimeLabel(lead):
+    for label, presetLead in LEAD_TIMES:
+        if presetLead == lead:
+            return label
+    if lead % 3600 == 0:
+        return f"{lead // 3600} hours before"
+    return f"{round(lead / 60)} minutes before"
+
+
+def remindAt(task):
+    """(epoch time of the reminder, deadline) of an active task row, None if it has no reminder."""
+    return None if task[5] is None else (task[3] - task[5], task[3])
+
+
+def reminderWake(reminder, now):
+    # a reminder whose moment passed while the app wasn't running (or that was set too close to the deadline) is
+    # shown right away, unless the deadline passed too
+    remindTime, deadline = reminder
+    return max(remindTime, now) if deadline > now else None
+
+
+def dueLabel(delta):
+    # the timer fires a little after the reminder, a reminder at the deadline would already read "late"
+    return "Due now" if delta < 60 else timeLabel(delta)[0]
+
+
+class ReminderService(QObject):
+    """Shows the reminders of the active tasks as tray notifications, or in a message box without a tray."""
+
+    def __init__(self, tray, parent=None):
+        super(ReminderService, self).__init__(parent)
+
+        self.tray = tray
+        self._tasks = {}  # id -> task row of the tasks with a reminder
+        self._shown = {}  # id -> remindAt() of the reminders shown already, they are not scheduled again
+        self.scheduler = DeadlineScheduler(reminderWake, self)
+        self.scheduler.due.connect(self.remind)
+
+    def __len__(self):
+        return len(self.scheduler)
+
+    def setTasks(self, tasks):
+        self._tasks = {task[0]: task for task in tasks if task[5] is not None}
+        self._shown = {rowid: reminder for rowid, reminder in self._shown.items()
+                       if rowid in self._tasks and remindAt(self._tasks[rowid]) == reminder}
+        self.scheduler.reset((rowid, remindAt(task)) for rowid, task in self._tasks.items() if rowid not in self._shown)
+
+    def applyChanges(self, tasks, changedIds):
+        """Follow the rows of `changedIds`, `tasks` holds those still active."""
+        byId = {task[0]: task for task in tasks}
+        for rowid in changedIds:
+            task = byId.get(rowid)
+            if task is None or task[5] is None:
+                self._tasks.pop(rowid, None)
+                self._shown.pop(rowid, None)
+                self.scheduler.unschedule(rowid)
+                continue
+            self._tasks[rowid] = task
+            if self._shown.get(rowid) != remindAt(task):
+                # a new reminder time or deadline brings a reminder shown already back
+                self._shown.pop(rowid, None)
+                self.scheduler.schedule(rowid, remindAt(task))
+
+    def remind(self, rowids):
+        now = time.time()
+        tasks = [self._tasks[rowid] for rowid in rowids if rowid in self._tasks]
+        for task in tasks:
+            self._shown[task[0]] = remindAt(task)
+            self.scheduler.unschedule(task[0])
+        if len(tasks) > MAX_MESSAGES:
+            names = ", ".join(task[1] for task in tasks[:MAX_MESSAGES])
+            messages = [(f"{len(tasks)} tasks are due soon", f"{names} and {len(tasks) - MAX_MESSAGES} more")]
+        else:
+            messages = [(task[1], f"{dueLabel(task[3] - now)}: {task[2]}") for task in tasks]
+        for title, message in messages:
+            if self.tray is not None:
+                self.tray.showMessage(title, message, QSystemTrayIcon.MessageIcon.Information, 10000)
+            else:
+                box = QMessageBox(QMessageBox.Icon.Information, title, message, QMessageBox.StandardButton.Ok,
+                                  self.parent())
+                box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+                box.open()
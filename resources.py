@@ -0,0 +1,28 @@
+"""Icons and cursors shared by every widget, each one is loaded once and then reused.
+
+The images are read from the compiled Qt resource module when it was generated with
+`pyside6-rcc resources.qrc -o resources_rc.py`, and from the img folder otherwise.
+"""
+from PySide6.QtGui import QCursor, QIcon
+
+try:
+    import resources_rc  # noqa: F401
+    IMAGE_DIR = ":/img/"
+except ImportError:
+    IMAGE_DIR = "img/"
+
+_icons = {}
+_cursors = {}
+
+
+def icon(name):
+    """Return the QIcon of img/<name>.png."""
+    if name not in _icons:
+        _icons[name] = QIcon(IMAGE_DIR + name + ".png")
+    return _icons[name]
+
+
+def cursor(shape):
+    if shape not in _cursors:
+        _cursors[shape] = QCursor(shape)
+    return _cursors[shape]
@@ -0,0 +1,100 @@
+import heapq
+import math
+import time
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# QTimer intervals are a signed 32-bit number of milliseconds
+MAX_TIMER_INTERVAL = 2 ** 31 - 1
+
+
+class DeadlineScheduler(QObject):
+    """Keeps a min-heap of the next moment each key needs attention and arms one single-shot timer for the
+    earliest of them.
+
+    `nextWake(deadline, now)` returns the epoch time at which a key with the given deadline next needs
+    attention (or None for never), the keys due at that moment are emitted through `due`.
+    """
+
+    due = Signal(list)
+
+    def __init__(self, nextWake, parent=None):
+        super(DeadlineScheduler, self).__init__(parent)
+
+        self.nextWake = nextWake
+        self._heap = []  # (wake time, key, deadline)
+        self._deadlines = {}  # key -> deadline, heap entries that disagree with it are stale
+        self._armedAt = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, key, deadline, now=None):
+        if self._deadlines.get(key) == deadline:
+            return
+        self._deadlines[key] = deadline
+        self._push(key, deadline, time.time() if now is None else now)
+        self._arm()
+
+    def unschedule(self, key):
+        self._deadlines.pop(key, None)
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [entry for entry in self._heap if self._deadlines.get(entry[1]) == entry[2]]
+            heapq.heapify(self._heap)
+
+    def reset(self, items, now=None):
+        """Replace everything scheduled with the (key, deadline) pairs of `items`."""
+        now = time.time() if now is None else now
+        self._deadlines = dict(items)
+        self._heap = []
+        for key, deadline in self._deadlines.items():
+            wake = self.nextWake(deadline, now)
+            if wake is not None:
+                self._heap.append((wake, key, deadline))
+        heapq.heapify(self._heap)
+        self._armedAt = None
+        self._arm()
+
+    def nextWakeTime(self):
+        self._dropStale()
+        return self._heap[0][0] if self._heap else None
+
+    def _push(self, key, deadline, now):
+        wake = self.nextWake(deadline, now)
+        if wake is not None:
+            heapq.heappush(self._heap, (wake, key, deadline))
+
+    def _dropStale(self):
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def _arm(self):
+        self._dropStale()
+        if not self._heap:
+            self._timer.stop()
+            self._armedAt = None
+            return
+        wake = self._heap[0][0]
+        if wake == self._armedAt and self._timer.isActive():
+            return
+        self._armedAt = wake
+        self._timer.start(min(max(0, math.ceil((wake - time.time()) * 1000)), MAX_TIMER_INTERVAL))
+
+    def _fire(self):
+        now = time.time()
+        dueEntries = []
+        while self._heap and self._heap[0][0] <= now:
+            wake, key, deadline = heapq.heappop(self._heap)
+            if self._deadlines.get(key) == deadline:
+                dueEntries.append((key, deadline))
+        for key, deadline in dueEntries:
+            self._push(key, deadline, now)
+        dueKeys = [key for key, deadline in dueEntries]
+        self._armedAt = None
+        self._arm()
+        if dueKeys:
+            self.due.emit(dueKeys)
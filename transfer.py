@@ -0,0 +1,149 @@
+"""Streaming import and export of tasks and finished tasks as CSV or JSON Lines.
+
+    python transfer.py export tasks tasks.csv
+    python transfer.py import finished_tasks history.jsonl --db other.db
+
+Files are read and written through generators and TaskRepository.importTasks() inserts BATCH_SIZE rows per
+transaction, so memory stays bounded whatever the size of the file. Times are epoch seconds, an import also takes ISO 8601 dates.
+"""
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import sqlite3
+import sys
+
+BATCH_SIZE = 20000
+COLUMNS = {
+    "tasks": ("title", "text_content", "time_limit"),
+    "finished_tasks": ("title", "text_content", "time_done"),
+}
+FORMATS = ("csv", "jsonl")
+
+
+def columns(table):
+    if table not in COLUMNS:
+        raise ValueError(f"can not transfer table {table!r}, only {', '.join(COLUMNS)}")
+    return COLUMNS[table]
+
+
+def fileFormat(path, format=None):
+    """The format given, or else the one the extension of `path` names."""
+    format = (format or os.path.splitext(path)[1].lstrip(".")).lower()
+    if format in ("json", "ndjson"):
+        format = "jsonl"
+    if format not in FORMATS:
+        raise ValueError(f"unknown file format {format!r}, use .csv or .jsonl")
+    return format
+
+
+def timestamp(value):
+    """Epoch seconds of a number, a numeric string or an ISO 8601 date."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.datetime.fromisoformat(value.strip()).timestamp())
+
+
+def requiredText(value, name):
+    """A title or description as text, the app doesn't allow them empty."""
+    if value is None or not str(value).strip():
+        raise ValueError(f"{name} is empty")
+    return str(value)
+
+
+def csvRows(file, table):
+    names = columns(table)
+    reader = csv.reader(file)
+    header = next(reader, [])
+    try:
+        title, textContent, timeColumn = (header.index(name) for name in names)
+    except ValueError:
+        raise ValueError(f"the CSV header needs the columns {', '.join(names)}") from None
+    for line, record in enumerate(reader, 2):
+        try:
+            yield (requiredText(record[title], names[0]), requiredText(record[textContent], names[1]),
+                   timestamp(record[timeColumn]))
+        except (IndexError, ValueError) as error:
+            raise ValueError(f"line {line} can not be imported: {error!r}") from None
+
+
+def jsonlRows(file, table):
+    title, textContent, timeColumn = columns(table)
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+            yield (requiredText(record[title], title), requiredText(record[textContent], textContent),
+                   timestamp(record[timeColumn]))
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"line {line} can not be imported: {error!r}") from None
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def readTasks(path, table, format=None):
+    """The (title, text_content, time) rows of the CSV or JSON Lines file at `path`, read as they are consumed."""
+    format = fileFormat(path, format)
+    with open(path, newline="", encoding="utf-8") as file:
+        yield from csvRows(file, table) if format == "csv" else jsonlRows(file, table)
+
+
+def exportRows(con, table, path, format=None, progress=None, batchSize=BATCH_SIZE):
+    """Write `table` to the file at `path` in deadline order, returns how many rows were written."""
+    names = columns(table)
+    format = fileFormat(path, format)
+    cursor = con.execute(f"SELECT {', '.join(names)} FROM {table} ORDER BY {names[2]}, id")
+    count = 0
+    encode = json.JSONEncoder(ensure_ascii=False, check_circular=False).encode
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if format == "csv":
+            writer = csv.writer(file)
+            writer.writerow(names)
+        while rows := cursor.fetchmany(batchSize):
+            if format == "csv":
+                writer.writerows(rows)
+            else:
+                file.writelines(encode(dict(zip(names, row))) + "\n" for row in rows)
+            count += len(rows)
+            if progress is not None:
+                progress(count)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export tasks as CSV or JSON Lines.")
+    parser.add_argument("direction", choices=("import", "export"))
+    parser.add_argument("table", choices=tuple(COLUMNS))
+    parser.add_argument("path", help="a .csv or .jsonl file")
+    parser.add_argument("--format", choices=FORMATS, help="file format when the extension doesn't tell")
+    parser.add_argument("--db", default="taskManager.db", help="task database (taskManager.db)")
+    args = parser.parse_args()
+
+    from database import TaskRepository
+
+    repository = TaskRepository(args.db)
+    method = repository.importTasks if args.direction == "import" else repository.exportTasks
+    try:
+        count = method(args.table, args.path, args.format,
+                       lambda done: print(f"\r{done} rows", end="", file=sys.stderr, flush=True))
+    except (OSError, ValueError, sqlite3.Error) as error:
+        sys.exit(f"\n{args.direction} failed: {error}")
+    finally:
+        repository.close()
+    print(f"\r{args.direction}ed {count} rows", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()